@@ -0,0 +1,275 @@
+import collections
+import io
+import os
+import pygame
+import atlas as atlas_module
+
+#game is imported inside the loaders: game imports the entity modules, which import
+#this module, so a top-level import would make the import order matter.
+
+class Frame:
+    def __init__(self, surface, mask=None):
+        """ A single animation frame together with the collision data derived from it.
+
+        Args:
+            surface (pygame.Surface): the frame surface. Its colorkey or alpha defines the mask.
+            mask (pygame.mask.Mask): a precomputed mask, e.g. from the atlas. Built from the surface when omitted.
+        """
+        self.surface = surface
+        self.mask = mask if mask is not None else pygame.mask.from_surface(surface)
+        self.rect = surface.get_rect()
+        bounds = self.mask.get_bounding_rects()
+        self.bounds = bounds[0].unionall(bounds[1:]) if bounds else pygame.Rect(0, 0, 0, 0)
+
+class AssetCache:
+    def __init__(self, max_entries):
+        """ A bounded, least-recently-used cache for decoded assets.
+
+        Args:
+            max_entries (int): the number of entries kept before the least recently used one is evicted.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries = collections.OrderedDict()
+
+    def get(self, key, loader):
+        """ Returns the cached value for a key, loading it on a miss.
+
+        Args:
+            key (tuple): the cache key.
+            loader (function): called with no arguments to build the value on a miss.
+
+        Returns:
+            object: the cached value.
+        """
+        if key in self.__entries:
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return self.__entries[key]
+
+        self.misses += 1
+        value = loader()
+        self.__entries[key] = value
+        while len(self.__entries) > self.max_entries:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def clear(self):
+        """ Empties the cache, e.g. after the display format changes. Counters are kept.
+        """
+        self.__entries.clear()
+
+    def stats(self):
+        """ Returns the cache counters.
+
+        Returns:
+            dict: the number of entries, hits, misses and evictions.
+        """
+        return {"entries": len(self.__entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __len__(self):
+        return len(self.__entries)
+
+def sheet(folder, action):
+    """ Returns a decoded sprite sheet, loading it from disk only once.
+
+    The returned surface is shared, so it must not be drawn on.
+
+    Args:
+        folder (String): directory where the sprite sheet is.
+        action (String): sprite sheet image file.
+
+    Returns:
+        pygame.Surface: the sprite sheet.
+    """
+    import game
+    path = folder + "/" + action + ".png"
+    return cache.get(("sheet", path), lambda: game.load_sprite_sheet(folder, action))
+
+def sprite_frames_key(folder, action, width, height, color_key):
+    """ Returns the cache key of sprite_frames, which also indexes the frames in the atlas.
+    """
+    return (folder + "/" + action + ".png", (0, 0, width, height), 2, color_key)
+
+def sprite_frames(folder, action, width, height, color_key):
+    """ Returns the scaled animation frames of a sprite sheet.
+
+    Args:
+        folder (String): directory where the sprite sheet is.
+        action (String): sprite sheet image file.
+        width (int): width of a single frame within the sheet.
+        height (int): height of a single frame within the sheet.
+        color_key (pygame.Color): the color within the frames that will be made transparent.
+
+    Returns:
+        list: a list of type Frame, one for each sprite within the sheet.
+    """
+    key = sprite_frames_key(folder, action, width, height, color_key)
+
+    def loader():
+        import game
+        if atlas is not None and key in atlas:
+            return atlas.frames(key)
+        return [Frame(f) for f in game.get_sprite_list(width, height, sheet(folder, action), color_key)]
+
+    return cache.get(key, loader)
+
+def tile_key(folder, action, area, scale=1):
+    """ Returns the cache key of tile, which also indexes the tile in the atlas.
+    """
+    return (folder + "/" + action + ".png", tuple(area), scale, None)
+
+def tile(folder, action, area, scale=1):
+    """ Returns a single block cut from a sprite sheet.
+
+    Args:
+        folder (String): directory where the sprite sheet is.
+        action (String): sprite sheet image file.
+        area (tuple): the (x, y, width, height) area of the sheet to cut.
+        scale (float): extra scale applied after the block is doubled by load_block.
+
+    Returns:
+        Frame: the block frame.
+    """
+    key = tile_key(folder, action, area, scale)
+
+    def loader():
+        import game
+        if atlas is not None and key in atlas:
+            return atlas.frames(key)[0]
+        surface = game.load_block(area[0], area[1], area[2], area[3], sheet(folder, action))
+        if scale != 1:
+            surface = pygame.transform.scale_by(surface, scale)
+        return Frame(surface)
+
+    return cache.get(key, loader)
+
+def cutout_key(folder, action, scale, area, color_key):
+    """ Returns the cache key of cutout, which also indexes the cutout in the atlas.
+    """
+    return ("cutout", folder + "/" + action + ".png", scale, tuple(area), color_key)
+
+def cutout(folder, action, scale, area, color_key):
+    """ Returns an area cut from a scaled image, such as the start screen's space bar.
+
+    Args:
+        folder (String): directory where the image is.
+        action (String): image file.
+        scale (float): scale applied to the whole image before cutting.
+        area (tuple): the (x, y, width, height) area of the scaled image to cut.
+        color_key (pygame.Color): the color within the area that will be made transparent.
+
+    Returns:
+        Frame: the cut out frame.
+    """
+    key = cutout_key(folder, action, scale, area, color_key)
+
+    def loader():
+        import game
+        if atlas is not None and key in atlas:
+            return atlas.frames(key)[0]
+        surface = game.spacebar_animation(pygame.transform.scale_by(game.load_sprite_sheet(folder, action), scale), *area)
+        surface.set_colorkey(color_key)
+        return Frame(surface)
+
+    return cache.get(key, loader)
+
+def load_atlas(path):
+    """ Serves frames from a built texture atlas instead of decoding and scaling the sheets.
+
+    Clears the cache. Does nothing but clear the atlas if the path is None or has not been built.
+
+    Args:
+        path (String): the atlas.json file written by the atlas module's build step.
+    """
+    global atlas
+    cache.clear()
+    images.clear()
+    atlas = atlas_module.Atlas(path) if path is not None and os.path.exists(path) else None
+
+def read_disk(path):
+    """ Called before anything is loaded from disk, which is not allowed once the store is sealed.
+
+    Args:
+        path (String): the file about to be loaded.
+    """
+    if sealed:
+        raise RuntimeError(path + " was loaded from disk during play, add it to the files preloaded by game.preload_jobs")
+
+def image(path, alpha=True):
+    """ Returns an image converted for the display, from the store if it was preloaded.
+
+    Args:
+        path (String): the image file.
+        alpha (bool): convert with per-pixel alpha. None converts with alpha only if the image has it.
+
+    Returns:
+        pygame.Surface: the converted image.
+    """
+    if path in images:
+        return images[path]
+    read_disk(path)
+    return convert(pygame.image.load(path), alpha)
+
+def convert(surface, alpha=True):
+    """ Converts a decoded image to the display format. Must run on the main thread.
+
+    Args:
+        surface (pygame.Surface): the decoded image.
+        alpha (bool): convert with per-pixel alpha. None converts with alpha only if the image has it.
+
+    Returns:
+        pygame.Surface: the converted image.
+    """
+    if alpha or (alpha is None and surface.get_alpha() is not None):
+        return surface.convert_alpha()
+    return surface.convert()
+
+def sound(path):
+    """ Returns a decoded sound, from the store if it was preloaded.
+
+    Args:
+        path (String): the sound file.
+
+    Returns:
+        pygame.mixer.Sound: the sound.
+    """
+    if path in sounds:
+        return sounds[path]
+    read_disk(path)
+    return pygame.mixer.Sound(path)
+
+def source(path):
+    """ Returns what pygame should load a file from: an in-memory copy if it was preloaded, otherwise the path.
+
+    Args:
+        path (String): the file.
+
+    Returns:
+        object: a file-like object or the path.
+    """
+    if path in files:
+        return io.BytesIO(files[path])
+    read_disk(path)
+    return path
+
+def seal(value=True):
+    """ Forbids, or allows again, loading anything from disk, e.g. while a run is being played.
+
+    Args:
+        value (bool): whether disk loads raise RuntimeError.
+    """
+    global sealed
+    sealed = value
+
+cache = AssetCache(64)
+atlas = None # the atlas.Atlas frames are served from, see load_atlas.
+
+#decoded files kept for the whole session, filled by the preload module
+images = {} # path to image converted for the display.
+sounds = {} # path to pygame.mixer.Sound.
+files = {} # path to file contents, e.g. fonts and music that pygame reads while in use.
+sealed = False # set by seal.
@@ -0,0 +1,162 @@
+""" Packs every sprite frame the game uses into one pre-scaled texture atlas.
+
+The build step runs the asset loaders once and packs their output into two files:
+atlas.bin holds a small header followed by the RGBA pixels and an 8-bit plane of
+mask bits, and atlas.json indexes the sub-rects of every frame by its asset cache
+key. At runtime the atlas is memory-mapped and converted to the display format in
+one go, and the asset loaders serve subsurface views of it instead of decoding and
+scaling the sheets. Rebuild it after changing any image, from the repository root:
+
+    python atlas.py
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import pygame
+
+MAGIC = b"RATL"
+VERSION = 1
+HEADER = struct.Struct("<4sBHH") # magic, version, width, height
+WIDTH = 1024 # width of the atlas, frames are packed into shelves across it.
+
+def sources():
+    """ Lists every frame the game uses and the loader that produces it, without loading anything.
+
+    Returns:
+        list: (asset cache key, loader, loader arguments) triples.
+    """
+    import game
+    import assets
+    entries = []
+    for action in ("run", "jump", "fall"):
+        args = ("sprites", action, game.PLAYER_WIDTH, game.PLAYER_HEIGHT, game.BLACK)
+        entries.append((assets.sprite_frames_key(*args), assets.sprite_frames, args))
+    for area, scale in [((96, 0, 48, 48), 1)] + game.OBSTACLE_KINDS:
+        args = ("terrain", "Terrain", area, scale)
+        entries.append((assets.tile_key(*args), assets.tile, args))
+    spacebar = ("other", "space_bar", 0.5, tuple(game.SPACE_BAR_DIMENSIONS), game.BLACK)
+    entries.append((assets.cutout_key(*spacebar), assets.cutout, spacebar))
+    return entries
+
+def manifest():
+    """ Loads every frame the game uses, as the game's own loaders produce it.
+
+    Returns:
+        list: (asset cache key, list of Frame) pairs.
+    """
+    entries = []
+    for key, loader, args in sources():
+        frames = loader(*args)
+        entries.append((key, frames if isinstance(frames, list) else [frames]))
+    return entries
+
+def pack(sizes, width=WIDTH):
+    """ Places rectangles into shelves, tallest first.
+
+    Args:
+        sizes (list): the (width, height) of each rectangle.
+        width (int): the width of the area to pack into.
+
+    Returns:
+        tuple: the (x, y) of each rectangle, in the order given, and the height used.
+    """
+    positions = [None] * len(sizes)
+    x = y = shelf = 0
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i][1]):
+        w, h = sizes[i]
+        if x + w > width:
+            x, y = 0, y + shelf
+            shelf = 0
+        positions[i] = (x, y)
+        x += w
+        shelf = max(shelf, h)
+    return positions, y + shelf
+
+def build(folder="atlas"):
+    """ Builds atlas.bin and atlas.json in a folder. The display must be initialised.
+
+    Args:
+        folder (String): the folder to write to.
+    """
+    entries = manifest()
+    frames = [frame for _, frame_list in entries for frame in frame_list]
+    positions, height = pack([frame.rect.size for frame in frames])
+
+    pixels = pygame.Surface((WIDTH, height), pygame.SRCALPHA)
+    masks = pygame.Surface((WIDTH, height), depth=8)
+    masks.set_palette([(i, i, i) for i in range(256)])
+    for frame, position in zip(frames, positions):
+        pixels.blit(frame.surface, position) #colorkeyed pixels stay transparent.
+        masks.blit(frame.mask.to_surface(setcolor=(255, 255, 255), unsetcolor=(0, 0, 0)), position)
+
+    index = {}
+    rects = iter(zip(frames, positions))
+    for key, frame_list in entries:
+        index[repr(key)] = [[x, y, frame.rect.width, frame.rect.height] for frame, (x, y) in (next(rects) for _ in frame_list)]
+
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, "atlas.bin"), "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, WIDTH, height))
+        f.write(pygame.image.tobytes(pixels, "RGBA"))
+        f.write(pygame.image.tobytes(masks, "P"))
+    with open(os.path.join(folder, "atlas.json"), "w") as f:
+        json.dump({"version": VERSION, "width": WIDTH, "height": height, "entries": index}, f)
+
+class Atlas:
+    def __init__(self, index_path):
+        """ A built atlas, loaded with a single read of its memory-mapped pixels.
+
+        The display must be initialised, the pixels are converted to its format.
+
+        Args:
+            index_path (String): the atlas.json file. atlas.bin is read from the same folder.
+        """
+        with open(index_path) as f:
+            index = json.load(f)
+        with open(os.path.join(os.path.dirname(index_path), "atlas.bin"), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, width, height = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or version != VERSION or version != index["version"]:
+                raise ValueError("atlas is not version {}, rebuild it: {}".format(VERSION, index_path))
+            size = width * height
+            with memoryview(data) as view:
+                with view[HEADER.size:HEADER.size + size * 4] as pixels:
+                    self.surface = pygame.image.frombuffer(pixels, (width, height), "RGBA").convert_alpha()
+                #the mask plane is small, and its surface must outlive the map
+                self.__mask_plane = bytes(view[HEADER.size + size * 4:HEADER.size + size * 5])
+        self.__masks = pygame.image.frombuffer(self.__mask_plane, (width, height), "P")
+        self.__entries = index["entries"]
+
+    def __contains__(self, key):
+        return repr(key) in self.__entries
+
+    def frames(self, key):
+        """ Returns the frames packed for an asset cache key.
+
+        Args:
+            key (tuple): the asset cache key.
+
+        Returns:
+            list: a list of type Frame, whose surfaces are subsurfaces of the atlas.
+        """
+        import assets
+        frames = []
+        for rect in self.__entries[repr(key)]:
+            mask = self.__masks.subsurface(rect)
+            mask.set_colorkey(0)
+            frames.append(assets.Frame(self.surface.subsurface(rect), pygame.mask.from_surface(mask)))
+        return frames
+
+def main():
+    import headless #the loaders need a display to convert surfaces to.
+    import game
+    parser = argparse.ArgumentParser(description="Pack the game's sprite frames into a texture atlas.")
+    parser.add_argument("--folder", default=os.path.dirname(game.ATLAS_PATH))
+    args = parser.parse_args()
+    game.init(game.Config(audio=False, ATLAS_PATH=None))
+    build(args.folder)
+    print("wrote {} and {}".format(os.path.join(args.folder, "atlas.bin"), os.path.join(args.folder, "atlas.json")))
+
+if __name__ == "__main__":
+    main()
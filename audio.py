@@ -0,0 +1,82 @@
+import pygame
+import assets
+
+class Mixer:
+    def __init__(self, effects, channels, min_interval):
+        """ Plays preloaded sound effects on a reserved pool of channels, separate from the music stream.
+
+        Does nothing when the mixer has not been initialised, e.g. in headless runs.
+
+        Args:
+            effects (dict): maps effect names to file names within the sounds folder.
+            channels (int): the number of channels reserved for effects.
+            min_interval (float): shortest time in seconds between two plays of the same effect.
+        """
+        self.enabled = pygame.mixer.get_init() is not None
+        self.min_interval = min_interval * 1000
+        self.__sounds = {}
+        self.__channels = []
+        self.__started = []
+        self.__last_played = {}
+        if not self.enabled:
+            return
+
+        if pygame.mixer.get_num_channels() < channels:
+            pygame.mixer.set_num_channels(channels)
+        pygame.mixer.set_reserved(channels)
+        self.__channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        self.__started = [0] * channels
+        for name, file in effects.items():
+            self.__sounds[name] = assets.sound("sounds/" + file)
+
+    def play(self, name):
+        """ Plays an effect, unless the same effect was played too recently.
+
+        Uses an idle reserved channel, or steals the one whose sound started longest ago.
+
+        Args:
+            name (String): the name of the effect.
+
+        Returns:
+            bool: True if the effect was played.
+        """
+        if not self.enabled:
+            return False
+        now = pygame.time.get_ticks()
+        last = self.__last_played.get(name)
+        if last is not None and now - last < self.min_interval:
+            return False
+
+        index = None
+        for i, channel in enumerate(self.__channels):
+            if not channel.get_busy():
+                index = i
+                break
+        if index is None:
+            index = self.__started.index(min(self.__started))
+
+        self.__channels[index].play(self.__sounds[name])
+        self.__started[index] = now
+        self.__last_played[name] = now
+        return True
+
+    def music(self, music, volume):
+        """ Loops a music track on the music stream, which effects never interrupt.
+
+        Args:
+            music (String): The name of the music file, without its .mp3 extension.
+            volume (int): The volume as a ratio of the original volume
+        """
+        if not self.enabled:
+            return
+        pygame.mixer.music.load(assets.source("sounds/" + music + ".mp3"), "mp3")
+        pygame.mixer.music.play(-1)
+        pygame.mixer.music.set_volume(volume)
+
+    def stop_music(self):
+        """ Stops and unloads the music track.
+        """
+        if not self.enabled:
+            return
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
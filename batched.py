@@ -0,0 +1,332 @@
+""" Advances many independent games in lockstep with NumPy.
+
+Each runner follows the same per-tick rules as simulation.Simulation while it is
+playing: collision, update_score, load_obstacles, move and Character.loop, in that
+order. Runners that die are recorded and restarted in place. Every runner has its
+own level seed, and the current chunk of every runner's level, see level.chunk, is
+kept in one array with a cursor per runner, so that spawns are placed for all
+runners at once. Collision uses overlap tables precomputed from the frame masks of
+every obstacle kind instead of per-object collide_mask calls, at the same points
+along the last tick that collision.swept_hit samples, so runners die on the same
+ticks as simulation.Simulation.
+
+Requires numpy. Importing this module selects SDL's dummy drivers through headless.
+Run from the repository root:
+
+    python batched.py --runners 1024 --ticks 2000
+"""
+import argparse
+import time
+import numpy as np
+import headless
+import game
+import assets
+import character
+import controls
+import simulation
+import level
+
+class BatchedRunner:
+    EMPTY = 1 << 40 # x-position of the empty slots, too far right for any test to reach.
+
+    def __init__(self, n, seed=None):
+        """ A batch of runners that all advance one tick per call to step.
+
+        Args:
+            n (int): the number of runners.
+            seed (int): seed of the random generator the level seeds are drawn from.
+        """
+        game.init()
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.ground_top = int(game.SCREEN_HEIGHT) - game.GROUND_BLOCK_HEIGHT
+        #obstacles live from x=-100 to two ticks past the right edge, and gaps only grow with the speed
+        self.slots = int(game.SCREEN_WIDTH + 100) // game.RAND_DIST_BETWEEN_BLOCKS[0] + 3 # obstacle slots per runner, more than fit on screen at once.
+        self.__build_tables()
+
+        self.y = np.zeros(n, dtype=np.int64)
+        self.prev_y = np.zeros(n, dtype=np.int64) # y-position at the start of the last tick.
+        self.y_vel = np.zeros(n)
+        self.fall_count = np.zeros(n, dtype=np.int64)
+        self.falling = np.zeros(n, dtype=bool)
+        self.animation_count = np.zeros(n, dtype=np.int64)
+        self.frame = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.obstacle_x = np.full((n, self.slots), self.EMPTY, dtype=np.int64)
+        self.prev_x = np.full((n, self.slots), self.EMPTY, dtype=np.int64) # x-positions before the last move.
+        self.kind = np.zeros((n, self.slots), dtype=np.int64)
+        self.seen = np.zeros((n, self.slots), dtype=bool)
+        self.last_x = np.full(n, self.EMPTY, dtype=np.int64) # x-position of each runner's latest spawn, see ObstaclePool.cursor.
+
+        #each runner's level: its seed, the chunk it is in and the next spawn within it
+        self.seeds = [0] * n
+        self.chunk = np.zeros(n, dtype=np.int64)
+        self.cursor = np.zeros(n, dtype=np.int64)
+        self.gaps = np.zeros((n, level.CHUNK), dtype=np.int64)
+        self.kinds = np.zeros((n, level.CHUNK), dtype=np.int64)
+
+        #results of the runs that ended during the last step
+        self.done = np.zeros(n, dtype=bool)
+        self.final_score = np.zeros(n, dtype=np.int64)
+        self.final_ticks = np.zeros(n, dtype=np.int64)
+        self.reset(np.ones(n, dtype=bool))
+
+    def __build_tables(self):
+        """ Precomputes the player frames' opaque bounds and their mask overlaps with every kind of obstacle.
+        """
+        run = assets.sprite_frames("sprites", "run", game.PLAYER_WIDTH, game.PLAYER_HEIGHT, game.BLACK)
+        fall = assets.sprite_frames("sprites", "fall", game.PLAYER_WIDTH, game.PLAYER_HEIGHT, game.BLACK)
+        frames = run + fall
+        self.run_frames = len(run)
+        self.fall_frame = len(run)
+        obstacles = [game.obstacle_frame(kind) for kind in range(len(game.OBSTACLE_KINDS))]
+
+        self.player_width, self.player_height = frames[0].rect.size
+        self.obstacle_width = np.array([o.rect.width for o in obstacles], dtype=np.int64)
+        self.obstacle_height = np.array([o.rect.height for o in obstacles], dtype=np.int64)
+        self.obstacle_y = self.ground_top - self.obstacle_height # obstacles stand on the ground.
+        self.left = np.array([f.bounds.x for f in frames], dtype=np.int64)
+        self.right = np.array([f.bounds.right for f in frames], dtype=np.int64)
+        self.top = np.array([f.bounds.y for f in frames], dtype=np.int64)
+        self.bottom = np.array([f.bounds.bottom for f in frames], dtype=np.int64)
+
+        #hits[k, f, dy + height - 1, dx + width - 1] is True when frame f overlaps an obstacle of kind k offset by (dx, dy) from the player.
+        self.hits = np.zeros((len(obstacles), len(frames), self.player_height + self.obstacle_height.max() - 1, self.player_width + self.obstacle_width.max() - 1), dtype=bool)
+        for k, obstacle in enumerate(obstacles):
+            width, height = obstacle.rect.size
+            for f, frame in enumerate(frames):
+                for j, dy in enumerate(range(1 - height, self.player_height)):
+                    for i, dx in enumerate(range(1 - width, self.player_width)):
+                        self.hits[k, f, j, i] = frame.mask.overlap(obstacle.mask, (dx, dy)) is not None
+
+    def reset(self, which, seeds=None):
+        """ Restarts the selected runners from the start position on new levels.
+
+        Args:
+            which (numpy.ndarray): boolean mask of the runners to restart.
+            seeds (list): the level seed of each selected runner. Drawn from the random generator when omitted.
+        """
+        self.y[which] = game.PLAYER_START_Y
+        self.prev_y[which] = game.PLAYER_START_Y
+        self.y_vel[which] = 0
+        self.fall_count[which] = 0
+        self.falling[which] = True
+        self.animation_count[which] = 0
+        self.frame[which] = 0
+        self.score[which] = 0
+        self.ticks[which] = 0
+        self.obstacle_x[which] = self.EMPTY
+        self.last_x[which] = self.EMPTY
+        rows = np.flatnonzero(which)
+        for n, i in enumerate(rows):
+            self.seeds[i] = int(self.rng.integers(1 << 63)) if seeds is None else seeds[n]
+        self.chunk[rows] = 0
+        self.cursor[rows] = 0
+        self.__load_chunks(rows)
+        self.__spawn(which, np.full(self.n, game.SCREEN_WIDTH - 2 * level.speed(0)))
+
+    def __load_chunks(self, rows):
+        """ Generates the current chunk of the selected runners' levels.
+
+        Args:
+            rows (numpy.ndarray): the runners.
+        """
+        for i in rows:
+            spawns = level.chunk(self.seeds[i], int(self.chunk[i]), game.RAND_DIST_BETWEEN_BLOCKS, len(game.OBSTACLE_KINDS))
+            self.gaps[i], self.kinds[i] = zip(*spawns)
+
+    def __spawn(self, which, limit):
+        """ Places the next spawns of the selected runners, as game.load_obstacles does.
+
+        Each pass places at most one obstacle per runner, in its first empty slot, and
+        stops once no runner has a spawn within its limit and a slot free for it.
+
+        Args:
+            which (numpy.ndarray): boolean mask of the runners to place spawns for.
+            limit (numpy.ndarray): each runner's rightmost x-position to place a spawn at.
+        """
+        rows = np.flatnonzero(which)
+        while rows.size:
+            last = self.last_x[rows]
+            x = np.where(last == self.EMPTY, limit[rows].astype(np.int64), last + self.gaps[rows, self.cursor[rows]])
+            due = x <= limit[rows]
+            rows, x = rows[due], x[due]
+            free = self.obstacle_x[rows] == self.EMPTY
+            room = free.any(axis=1)
+            rows, x, slot = rows[room], x[room], free[room].argmax(axis=1)
+            self.obstacle_x[rows, slot] = x
+            self.prev_x[rows, slot] = x
+            self.last_x[rows] = x
+            self.kind[rows, slot] = self.kinds[rows, self.cursor[rows]]
+            self.seen[rows, slot] = False
+            self.cursor[rows] += 1
+            ended = rows[self.cursor[rows] == level.CHUNK]
+            if ended.size:
+                self.chunk[ended] += 1
+                self.cursor[ended] = 0
+                self.__load_chunks(ended)
+
+    def collisions(self):
+        """ Tests every runner against its obstacles over the last tick, as collision.swept_hit does, using the precomputed overlap table.
+
+        Returns:
+            numpy.ndarray: boolean mask of the runners that touched an obstacle.
+        """
+        hit = np.zeros(self.n, dtype=bool)
+        #obstacles only move left and the player only vertically, so these are the pairs whose swept x-ranges can meet
+        rows, slots = np.nonzero((self.obstacle_x - game.PLAYER_START_X < self.player_width) & (self.prev_x - game.PLAYER_START_X > -self.obstacle_width.max()))
+        kind = self.kind[rows, slots]
+        frame = self.frame[rows]
+        width = self.obstacle_width[kind]
+        height = self.obstacle_height[kind]
+
+        #obstacle position relative to the player's rect at the start and end of the tick
+        x0 = self.prev_x[rows, slots] - game.PLAYER_START_X
+        y0 = self.obstacle_y[kind] - self.prev_y[rows]
+        vx = self.obstacle_x[rows, slots] - self.prev_x[rows, slots]
+        vy = self.prev_y[rows] - self.y[rows]
+        enter_x, exit_x = overlap_interval(x0, vx, self.left[frame] - width, self.right[frame])
+        enter_y, exit_y = overlap_interval(y0, vy, self.top[frame] - height, self.bottom[frame])
+        enter = np.maximum(enter_x, enter_y)
+        exit = np.minimum(exit_x, exit_y)
+        swept = enter < exit
+        if not swept.any():
+            return hit
+        rows, kind, frame, width, height = rows[swept], kind[swept], frame[swept], width[swept], height[swept]
+        x0, y0, vx, vy, enter, exit = x0[swept], y0[swept], vx[swept], vy[swept], enter[swept], exit[swept]
+
+        #the mask offsets at every sample of each pair, padded to the most samples of any pair
+        steps = np.maximum(1, np.ceil(np.maximum(np.abs(vx), np.abs(vy)) * (exit - enter))).astype(np.int64)
+        i = np.arange(steps.max() + 1)
+        t = enter[:, None] + (exit - enter)[:, None] * i / steps[:, None]
+        dx = np.rint(x0[:, None] + vx[:, None] * t).astype(np.int64)
+        dy = np.rint(y0[:, None] + vy[:, None] * t).astype(np.int64)
+        near = (i <= steps[:, None]) & (dx > -width[:, None]) & (dx < self.player_width) & (dy > -height[:, None]) & (dy < self.player_height)
+        dx = np.where(near, dx + width[:, None] - 1, 0)
+        dy = np.where(near, dy + height[:, None] - 1, 0)
+        hit[rows[(near & self.hits[kind[:, None], frame[:, None], dy, dx]).any(axis=1)]] = True
+        return hit
+
+    def step(self, inputs):
+        """ Advances every runner by one tick. Runners that die are restarted.
+
+        Args:
+            inputs (numpy.ndarray): an input snapshot per runner, bitfields of the controls module's bits.
+
+        Returns:
+            numpy.ndarray: boolean mask of the runners whose run ended this tick. Their
+            scores and lengths are in final_score and final_ticks.
+        """
+        inputs = np.asarray(inputs, dtype=np.int64)
+        self.done = self.collisions()
+        self.final_score = np.where(self.done, self.score, self.final_score)
+        self.final_ticks = np.where(self.done, self.ticks, self.final_ticks)
+        alive = ~self.done
+        #the obstacles of the runners that died are replaced when they restart, so they are moved along with the rest
+
+        #update_score
+        passed = (self.obstacle_x < game.PLAYER_START_X - game.OBSTACLE_WIDTH) & ~self.seen
+        self.score += passed.sum(axis=1)
+        self.seen |= passed
+
+        #load_obstacles: the next spawn goes at its gap from the latest one
+        self.obstacle_x[self.obstacle_x < -100] = self.EMPTY
+        speed = level.speed(self.score)
+        self.__spawn(alive, game.SCREEN_WIDTH - 2 * speed)
+
+        #move: obstacle speed scales with the score
+        self.prev_x = self.obstacle_x
+        self.obstacle_x = np.where(self.obstacle_x != self.EMPTY, round_rect(self.obstacle_x + speed[:, None]), self.obstacle_x)
+        self.last_x = np.where(self.last_x != self.EMPTY, round_rect(self.last_x + speed), self.last_x)
+
+        #Character.loop: jump, descend, fall, move and ground collision
+        self.prev_y = self.y
+        jump = alive & ((inputs & controls.JUMP) != 0) & ~self.falling
+        self.y_vel = np.where(jump, -character.Character.GRAVITY * 6, self.y_vel)
+        self.y_vel += np.where(alive & ((inputs & controls.DESCEND) != 0), 1.25, 0)
+        self.y_vel += np.where(alive, np.minimum(1, self.fall_count / simulation.TICK_RATE * character.Character.GRAVITY), 0)
+        self.fall_count += alive
+        self.falling |= alive
+        self.y = np.where(alive, round_rect(self.y + self.y_vel), self.y)
+        landed = alive & (self.y + self.bottom[self.frame] > self.ground_top)
+        self.y = np.where(landed, self.ground_top - self.player_height, self.y)
+        self.fall_count[landed] = 0
+        self.falling[landed] = False
+
+        #Character.update_sprite
+        run_frame = (self.animation_count // character.Character.ANIMATION_DELAY) % self.run_frames
+        self.frame = np.where(self.fall_count != 0, self.fall_frame, run_frame)
+        self.animation_count += alive
+        self.ticks += alive
+
+        if self.done.any():
+            self.reset(self.done)
+        return self.done
+
+def round_rect(values):
+    """ Rounds values the way pygame.Rect does when assigned a float, half away from zero.
+
+    Args:
+        values (numpy.ndarray): the values to round.
+
+    Returns:
+        numpy.ndarray: the rounded integer values.
+    """
+    return (np.sign(values) * np.floor(np.abs(values) + 0.5)).astype(np.int64)
+
+def overlap_interval(start, velocity, low, high):
+    """ The batched equivalent of collision.overlap_interval.
+
+    Args:
+        start (numpy.ndarray): the values at the start of the tick.
+        velocity (numpy.ndarray): the changes in value over the whole tick.
+        low (numpy.ndarray): the lower bounds.
+        high (numpy.ndarray): the upper bounds.
+
+    Returns:
+        tuple: the (enter, exit) times as fractions of the tick. enter >= exit when never inside.
+    """
+    still = velocity == 0
+    moving = np.where(still, 1, velocity)
+    enter = (low - start) / moving
+    exit = (high - start) / moving
+    enter, exit = np.minimum(enter, exit), np.maximum(enter, exit)
+    inside = (low < start) & (start < high)
+    enter = np.where(still, np.where(inside, 0, 1), np.maximum(enter, 0))
+    exit = np.where(still, np.where(inside, 1, 0), np.minimum(exit, 1))
+    return enter, exit
+
+def simple_policy(runner):
+    """ The batched equivalent of headless.simple_policy.
+
+    Args:
+        runner (BatchedRunner): the runners to decide inputs for.
+
+    Returns:
+        numpy.ndarray: an input snapshot per runner.
+    """
+    gap = runner.obstacle_x - (game.PLAYER_START_X + runner.player_width)
+    near = ((gap >= 0) & (gap <= headless.JUMP_DISTANCE)).any(axis=1)
+    return np.where(near, controls.JUMP, 0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run batched headless game episodes.")
+    parser.add_argument("--runners", type=int, default=1024)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    runner = BatchedRunner(args.runners, args.seed)
+    episodes = 0
+    total_score = 0
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        done = runner.step(simple_policy(runner))
+        episodes += int(done.sum())
+        total_score += int(runner.final_score[done].sum())
+    elapsed = time.perf_counter() - start
+    print("{} episodes, mean score {:.2f}, {:.0f} runner-ticks/s".format(episodes, total_score / max(episodes, 1), args.runners * args.ticks / elapsed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+""" Microbenchmark for the per-frame collision mask path.
+
+Compares the legacy behaviour, where Character.update() rebuilt its rect and mask
+on every draw, with the precomputed frame masks. Run from the repository root:
+
+    python -m benchmarks.bench_masks
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import game
+import block
+import character
+import obstacle
+
+FRAMES = 2000
+
+class LegacyCharacter(character.Character):
+    #per-instance copies, shadowing the properties that read the shared frame
+    sprite = None
+    mask = None
+
+    def update_sprite(self):
+        """ Selects the frame every draw and rebuilds the rect and mask, as before frame masks existed.
+        """
+        sprite_index = (self.animation_count // self.ANIMATION_DELAY) % len(self.sprite_list)
+        self.sprite = self.sprite_list[sprite_index].surface
+        self.animation_count += 1
+        self.rect = self.sprite.get_rect(topleft=(self.rect.x, self.rect.y))
+        self.mask = pygame.mask.from_surface(self.sprite)
+
+class LegacyObstacle(obstacle.Obstacle):
+    mask = None
+
+    def __init__(self, x, y, width, height, speed):
+        """ Builds a private mask for the obstacle, as before frame masks existed.
+        """
+        super().__init__(x, y, width, height, speed)
+        self.mask = pygame.mask.from_surface(self.sprite)
+
+def run(player_cls, obstacle_cls):
+    """ Runs FRAMES frames of Character.update_sprite and draw, Obstacle.collision and Character.collision.
+
+    Args:
+        player_cls (type): the Character class to benchmark.
+        obstacle_cls (type): the Obstacle class to benchmark.
+
+    Returns:
+        dict: masks built, rects rebuilt and seconds per frame.
+    """
+    masks_built = [0]
+    from_surface = pygame.mask.from_surface
+
+    def counting_from_surface(*args, **kwargs):
+        masks_built[0] += 1
+        return from_surface(*args, **kwargs)
+
+    ground_y = int(game.SCREEN_HEIGHT) - game.GROUND_BLOCK_HEIGHT
+    ground = block.Ground([block.Block(b, ground_y, game.GROUND_BLOCK_WIDTH, game.GROUND_BLOCK_HEIGHT) for b in range(0, int(game.SCREEN_WIDTH), game.GROUND_BLOCK_WIDTH)])
+    player = player_cls(game.PLAYER_START_X, ground_y - 64, game.PLAYER_WIDTH, game.PLAYER_HEIGHT)
+
+    pygame.mask.from_surface = counting_from_surface
+    try:
+        obstacles = [obstacle_cls(game.SCREEN_WIDTH + i * 300, ground_y - game.OBSTACLE_HEIGHT, game.OBSTACLE_WIDTH, game.OBSTACLE_HEIGHT, game.OBSTACLE_SPEED) for i in range(2)]
+        rects_built = 0
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            rect = player.rect
+            player.update_sprite()
+            player.draw(game.screen)
+            rects_built += player.rect is not rect
+            for o in obstacles:
+                o.collision(player)
+            player.collision(ground)
+        elapsed = time.perf_counter() - start
+    finally:
+        pygame.mask.from_surface = from_surface
+
+    return {"masks": masks_built[0] / FRAMES, "rects": rects_built / FRAMES, "ms": elapsed / FRAMES * 1000}
+
+def main():
+    game.init()
+    legacy = run(LegacyCharacter, LegacyObstacle)
+    current = run(character.Character, obstacle.Obstacle)
+    print("{:<10}{:>14}{:>14}{:>14}".format("", "masks/frame", "rects/frame", "ms/frame"))
+    for name, result in (("legacy", legacy), ("current", current)):
+        print("{:<10}{:>14.3f}{:>14.3f}{:>14.4f}".format(name, result["masks"], result["rects"], result["ms"]))
+    print("removed {:.3f} mask and {:.3f} rect allocations per frame".format(legacy["masks"] - current["masks"], legacy["rects"] - current["rects"]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+""" Benchmark suite for the simulation and render paths, compared against a stored baseline.
+
+Runs under SDL's dummy drivers at a fixed screen size and seed. Every benchmark reports
+its throughput, the median of several repeats that each run for at least MIN_TIME, and
+the net number of memory blocks it leaves allocated per operation, measured in a
+separate pass with the cyclic garbage collector paused so that garbage cycles show up
+as well. The process's peak RSS is reported at the end. Run from the repository root:
+
+    python -m benchmarks.suite                 # compare against benchmarks/baseline.json
+    python -m benchmarks.suite --save          # record a new baseline
+    python -m benchmarks.suite --save --only collision  # record the baseline of some benchmarks only
+
+The exit status is 1 when a result regresses past the threshold. Throughput depends on
+the machine, so the stored baseline only applies to the machine that recorded it; on
+any other machine, record a baseline with --save before making changes and compare
+against that.
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless
+import pygame
+import game
+import character
+import controls
+import level
+import render
+import simulation
+
+SCREEN_SIZE = (960, 540)
+SEED = 1
+REPEATS = 5
+MIN_TIME = 0.5 # seconds each timed repeat runs for at least.
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def sprite_loading(n):
+    """ Decodes the player's run sheet and slices it into frames, bypassing the asset cache.
+    """
+    for _ in range(n):
+        game.get_sprite_list(game.PLAYER_WIDTH, game.PLAYER_HEIGHT, game.load_sprite_sheet("sprites", "run"), game.BLACK)
+
+def update_sprite(n):
+    """ Advances the player's animation.
+    """
+    player = character.Character(game.PLAYER_START_X, game.PLAYER_START_Y, game.PLAYER_WIDTH, game.PLAYER_HEIGHT)
+    for _ in range(n):
+        player.update_sprite()
+
+def obstacle_spawning(n):
+    """ Scrolls a pool's obstacles off the left edge tick by tick and refills the screen from the level, as play does.
+    """
+    sim = simulation.Simulation(SEED)
+    obstacles = sim.obstacles
+    for _ in range(n):
+        #the obstacles spawned and gone again stand in for the score
+        speed = level.speed(obstacles.level.index - len(obstacles))
+        obstacles.move(speed)
+        game.load_obstacles(obstacles, speed)
+
+def collisions(n):
+    """ Tests obstacles sweeping past a player standing on the ground.
+    """
+    sim = simulation.Simulation(SEED)
+    player = sim.player
+    player.rect.bottom = sim.floor.rect.top
+    obstacles = list(sim.obstacles)
+    for _ in range(n):
+        for o in obstacles:
+            o.move()
+            if o.rect.right < 0:
+                o.reset(int(game.SCREEN_WIDTH), game.OBSTACLE_SPEED)
+            o.collision(player)
+        player.collision(sim.floor)
+
+def full_draw(n):
+    """ Draws complete frames of a run in progress and presents them.
+    """
+    sim = simulation.Simulation(SEED)
+    sim.step(controls.START)
+    background, tiles, bg_width = game.load_background(game.BACKGROUND, game.SCREEN_WIDTH)
+    static = render.static_layer(game.screen.get_size(), background, tiles, bg_width, sim.ground)
+    for _ in range(n):
+        game.screen.blit(static, (0, 0))
+        game.draw(game.screen, [], sim.player, sim.obstacles, sim.scoreboard, sim.state, None, "font1.ttf")
+        pygame.display.update()
+
+def gameplay(n):
+    """ Plays scripted runs, restarting after every death.
+    """
+    sim = simulation.Simulation(SEED)
+    sim.step(controls.START)
+    for _ in range(n):
+        if sim.state == "game_over":
+            sim.step(controls.START)
+        else:
+            sim.step(headless.simple_policy(sim))
+
+BENCHMARKS = (
+    ("sprite_loading", sprite_loading, 50, "loads/s"),
+    ("update_sprite", update_sprite, 200000, "ticks/s"),
+    ("obstacle_spawning", obstacle_spawning, 20000, "calls/s"),
+    ("collision", collisions, 50000, "ticks/s"),
+    ("full_draw", full_draw, 1000, "frames/s"),
+    ("gameplay", gameplay, 60 * 60, "ticks/s"), # one minute of play, see --seconds.
+)
+
+def measure(function, n):
+    """ Runs a benchmark REPEATS times for speed and once more for memory.
+
+    Each timed repeat calls the benchmark until MIN_TIME has passed, and the median
+    repeat is reported, so that one run disturbed by the rest of the machine does not
+    decide the result.
+
+    Args:
+        function (function): the benchmark, called with the number of operations.
+        n (int): the number of operations per run.
+
+    Returns:
+        dict: the median throughput in operations per second and the net blocks allocated per operation.
+    """
+    rates = []
+    for _ in range(REPEATS):
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            function(n)
+            runs += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_TIME:
+                break
+        rates.append(runs * n / elapsed)
+
+    gc.collect()
+    gc.disable()
+    try:
+        blocks = sys.getallocatedblocks()
+        function(n)
+        blocks = sys.getallocatedblocks() - blocks
+    finally:
+        gc.enable()
+    return {"rate": statistics.median(rates), "allocs": blocks / n}
+
+def run(seconds=None, only=None):
+    """ Runs the suite.
+
+    Args:
+        seconds (float): length of the scripted gameplay in simulated seconds. Defaults to one minute.
+        only (list): names of the benchmarks to run. Defaults to all of them.
+
+    Returns:
+        dict: the results of every benchmark and the peak RSS in KiB.
+    """
+    game.init(game.Config(SCREEN_SIZE, audio=False))
+    results = {}
+    for name, function, n, unit in BENCHMARKS:
+        if only and name not in only:
+            continue
+        if name == "gameplay" and seconds is not None:
+            n = int(seconds * simulation.TICK_RATE)
+        results[name] = measure(function, n)
+        results[name]["unit"] = unit
+    results["peak_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return results
+
+def compare(results, baseline, threshold):
+    """ Finds the results that regressed compared to a baseline.
+
+    Throughput may drop and peak RSS may grow by the threshold fraction. Allocations
+    per operation may grow by the threshold fraction plus one block.
+
+    Args:
+        results (dict): the results of run.
+        baseline (dict): earlier results of run.
+        threshold (float): the allowed regression, e.g. 0.2 for 20%.
+
+    Returns:
+        list: a description of every regression.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        if name == "peak_rss_kib":
+            if result > baseline[name] * (1 + threshold):
+                regressions.append("peak RSS {} KiB, baseline {} KiB".format(result, baseline[name]))
+            continue
+        old = baseline[name]
+        if result["rate"] < old["rate"] * (1 - threshold):
+            regressions.append("{} {:.0f} {}, baseline {:.0f}".format(name, result["rate"], result["unit"], old["rate"]))
+        if result["allocs"] > old["allocs"] * (1 + threshold) + 1:
+            regressions.append("{} {:.2f} allocations per operation, baseline {:.2f}".format(name, result["allocs"], old["allocs"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation and render paths.")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline, with --only replacing just those benchmarks and keeping the peak RSS")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression as a fraction")
+    parser.add_argument("--seconds", type=float, default=None, help="simulated seconds of scripted gameplay")
+    parser.add_argument("--only", nargs="*", help="benchmarks to run")
+    args = parser.parse_args()
+
+    results = run(args.seconds, args.only)
+    print("{:<20}{:>16}{:>16}".format("", "throughput", "allocs/op"))
+    for name, function, n, unit in BENCHMARKS:
+        if name in results:
+            print("{:<20}{:>16}{:>16.2f}".format(name, "{:.0f} {}".format(results[name]["rate"], unit), results[name]["allocs"]))
+    print("peak RSS {} KiB".format(results["peak_rss_kib"]))
+
+    if args.save:
+        baseline = {}
+        if args.only and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            #the peak RSS of some benchmarks is not comparable with that of the whole suite
+            results = {name: result for name, result in results.items() if name != "peak_rss_kib"}
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print("saved baseline to " + args.baseline)
+        return
+
+    if not os.path.exists(args.baseline):
+        print("no baseline at {}, run with --save to record one".format(args.baseline))
+        return
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    for regression in regressions:
+        print("REGRESSION: " + regression)
+    if regressions:
+        raise SystemExit(1)
+    print("no regressions beyond {:.0%}".format(args.threshold))
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import pygame
-import game
+import assets
+
+class Block:
+    __slots__ = ("rect", "frame")
 
-class Block(pygame.sprite.Sprite):
     def __init__(self, x, y, width, height):
         """ Defines a block.
 
@@ -12,21 +14,41 @@ class Block(pygame.sprite.Sprite):
             height (int): the height of the block.
         """
         self.rect = pygame.Rect(x, y, width, height)
-        self.sprite_sheet = game.load_sprite_sheet("terrain", "Terrain")
-        self.sprite = game.load_block(96, 0, 48, 48, self.sprite_sheet)
-        self.mask = pygame.mask.from_surface(self.sprite)
+        self.frame = assets.tile("terrain", "Terrain", (96, 0, 48, 48)) # shared by every block.
+
+    @property
+    def sprite(self):
+        """ The surface of the block's frame.
+        """
+        return self.frame.surface
+
+    @property
+    def mask(self):
+        """ The collision mask of the block's frame.
+        """
+        return self.frame.mask
 
     def draw(self, surface):
         """ Draw the block onto the screen
 
         Args:
             surface (Surface): The surface where the block is drawn on.
+
+        Returns:
+            pygame.Rect: the area of the surface that was drawn on.
+        """
+        return surface.blit(self.frame.surface, self.rect.topleft)
+
+class Ground:
+    __slots__ = ("rect", "mask")
+
+    def __init__(self, blocks):
+        """ The ground blocks merged into one rect and one mask for collision.
+
+        Args:
+            blocks (list): list of type Block making up the ground.
         """
-        surface.blit(self.sprite, (self.rect.x, self.rect.y))
-    
-            
-            
-    
-    
-
-    
+        self.rect = blocks[0].rect.unionall([b.rect for b in blocks[1:]])
+        self.mask = pygame.mask.Mask(self.rect.size)
+        for b in blocks:
+            self.mask.draw(b.frame.mask, (b.rect.x - self.rect.x, b.rect.y - self.rect.y))
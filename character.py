@@ -1,7 +1,12 @@
 import pygame
 import game 
+import assets
+import controls
+import collision
+
+class Character:
+    __slots__ = ("rect", "__x_vel", "__y_vel", "__fall_count", "__jumping", "__action", "sprite_list", "sprite_index", "frame", "animation_count", "falling", "previous")
 
-class Character(pygame.sprite.Sprite):
     #constants
     GRAVITY = 1
     SPEED = 3
@@ -20,17 +25,34 @@ class Character(pygame.sprite.Sprite):
         self.__y_vel = 0
         self.__fall_count = 0
         self.__jumping = False
-        self.sprite_sheet = game.load_sprite_sheet("sprites", "run")
-        self.sprite_list = game.get_sprite_list(game.PLAYER_WIDTH, game.PLAYER_HEIGHT, self.sprite_sheet, game.BLACK)
-        self.sprite = self.sprite_list[0]
+        self.__action = "run"
+        self.sprite_list = assets.sprite_frames("sprites", self.__action, game.PLAYER_WIDTH, game.PLAYER_HEIGHT, game.BLACK) # shared frames of the action.
+        self.sprite_index = 0
+        self.frame = self.sprite_list[0]
         self.animation_count = 0
-        self.mask = pygame.mask.from_surface(self.sprite)
         self.falling = True
+        self.previous = self.rect.topleft # position at the start of the last tick.
+        self.update()
+
+    @property
+    def sprite(self):
+        """ The surface of the current frame.
+        """
+        return self.frame.surface
+
+    @property
+    def mask(self):
+        """ The collision mask of the current frame.
+        """
+        return self.frame.mask
         
-    def descend(self):
+    def descend(self, inputs):
         """ Descending movement of player
+
+        Args:
+            inputs (int): the input snapshot for this tick.
         """
-        if pygame.key.get_pressed()[pygame.K_DOWN]:
+        if inputs & controls.DESCEND:
             self.__y_vel += 1.25
     
     def move(self, dx, dy):
@@ -43,18 +65,24 @@ class Character(pygame.sprite.Sprite):
         self.rect.y += dy
         self.rect.x += dx
     
-    def loop(self, fps, objects):
+    def loop(self, fps, objects, inputs):
         """ Combines this class' other methods
 
         Args:
-            fps (int): FPS game runs at
-            objects (Block): Objects to detect collision with (ground)
+            fps (int): tick rate the simulation runs at
+            objects (Ground): the ground to detect collision with
+            inputs (int): the input snapshot for this tick.
+
+        Returns:
+            bool: True if the player jumped during this tick.
         """
-        self.jump("jump.wav")
-        self.descend()
+        self.previous = self.rect.topleft
+        jumped = self.jump(inputs)
+        self.descend(inputs)
         self.fall(fps)
         self.move(self.__x_vel, self.__y_vel)
         self.collision(objects)
+        return jumped
         
     def fall(self, fps):
         """ Falling movement of the player.
@@ -67,59 +95,76 @@ class Character(pygame.sprite.Sprite):
         if not self.falling:
             self.falling = True
     
-    def jump(self, sound):
+    def jump(self, inputs):
         """ Jumping mechanism of player
 
         Args:
-            sound (String): Name of jumping sound file
+            inputs (int): the input snapshot for this tick.
+
+        Returns:
+            bool: True if the player jumped.
         """
-        if (pygame.key.get_pressed()[pygame.K_SPACE] or pygame.key.get_pressed()[pygame.K_UP]) and not self.falling:
-                pygame.mixer.music.load("sounds/" + sound)
-                pygame.mixer.music.play()
-                self.__y_vel = -self.GRAVITY * 6
+        if inputs & controls.JUMP and not self.falling:
+            self.__y_vel = -self.GRAVITY * 6
+            return True
+        return False
     
-    def collision(self, rectangles):
+    def collision(self, ground):
         """ Collision mechanism of player
 
         Args:
-            rectangles (Block): objects player potentially can collide with.
+            ground (Ground): the ground strip, tested as a single mask.
         """
-        for r in rectangles:
-            if pygame.sprite.collide_mask(self, r):
-                self.rect.bottom = r.rect.top
-                self.__fall_count = 0
-                if self.falling:
-                    self.falling = False
+        if not collision.player_bounds(self).colliderect(ground.rect):
+            collision.counters.ground_rejects += 1
+            return
+        collision.counters.ground_tests += 1
+        if self.frame.mask.overlap(ground.mask, (ground.rect.x - self.rect.x, ground.rect.y - self.rect.y)):
+            collision.counters.ground_hits += 1
+            self.rect.bottom = ground.rect.top
+            self.__fall_count = 0
+            if self.falling:
+                self.falling = False
             
     def draw(self, surface):
-        """ Draws the player
+        """ Draws the player. The animation itself is advanced by update_sprite once per tick.
 
         Args:
             surface (pygame.Surface): Surface where player is drawn on.
+
+        Returns:
+            pygame.Rect: the area of the surface that was drawn on.
         """
-        self.update_sprite()
-        surface.blit(self.sprite, (self.rect.x, self.rect.y))
+        return surface.blit(self.frame.surface, self.rect.topleft)
     
     def update(self):
-        """ Makes player's rectangle position matches its sprite position
+        """ Makes player's rectangle size match its current frame, keeping its position.
         """
-        self.rect = self.sprite.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.sprite)
+        self.rect.size = self.frame.rect.size
         
     def update_sprite(self):
         """ Updates sprite based on its current action.
         """
         if self.__jumping:
-            self.sprite_sheet = game.load_sprite_sheet("sprites", "jump")
+            action = "jump"
         elif self.__fall_count != 0:
-            self.sprite_sheet = game.load_sprite_sheet("sprites", "fall")
+            action = "fall"
         else:
-            self.sprite_sheet = game.load_sprite_sheet("sprites", "run")
+            action = "run"
         
-        self.sprite_list = game.get_sprite_list(32, 32, self.sprite_sheet, game.BLACK)
+        if action != self.__action:
+            self.__action = action
+            self.sprite_list = assets.sprite_frames("sprites", action, game.PLAYER_WIDTH, game.PLAYER_HEIGHT, game.BLACK)
+            self.sprite_index = -1
+
         sprite_index = (self.animation_count // self.ANIMATION_DELAY) % len(self.sprite_list)
-        self.sprite = self.sprite_list[sprite_index]
         self.animation_count += 1
+        if sprite_index == self.sprite_index:
+            return
+
+        # only swap to the precomputed mask when the frame actually changes.
+        self.sprite_index = sprite_index
+        self.frame = self.sprite_list[sprite_index]
         self.update()
     
     def set_y_vel(self, val):
@@ -0,0 +1,133 @@
+import math
+
+class CollisionCounters:
+    def __init__(self):
+        """ Counts how many pairs the broad phase rejects, how many the swept test clears and how many reach the mask test.
+
+        The player's contacts with the ground are counted apart from the obstacle pairs,
+        as the player touches the ground on most ticks.
+        """
+        self.reset()
+
+    def reset(self):
+        """ Sets every counter back to zero.
+        """
+        self.broad_rejects = 0
+        self.swept_clears = 0
+        self.narrow_tests = 0
+        self.hits = 0
+        self.ground_rejects = 0
+        self.ground_tests = 0
+        self.ground_hits = 0
+
+    def stats(self):
+        """ Returns the counters.
+
+        Returns:
+            dict: broad-phase rejects, swept-test clears, narrow-phase tests and hits of the obstacle pairs, and the same for the ground.
+        """
+        return {"broad_rejects": self.broad_rejects, "swept_clears": self.swept_clears, "narrow_tests": self.narrow_tests, "hits": self.hits,
+                "ground_rejects": self.ground_rejects, "ground_tests": self.ground_tests, "ground_hits": self.ground_hits}
+
+def player_bounds(player):
+    """ Returns the opaque area of the player's current frame in screen coordinates.
+
+    Args:
+        player (Character): the player.
+
+    Returns:
+        pygame.Rect: the bounding box of the player's mask.
+    """
+    return player.frame.bounds.move(player.rect.x, player.rect.y)
+
+def sweep(player, obstacles):
+    """ Broad phase: yields only the obstacles whose swept rect overlaps the player's swept opaque area.
+
+    The swept areas cover both the positions before and after the last tick.
+    Obstacles are visited in x order, so the sweep stops at the first one that
+    starts right of the player; every obstacle after it is rejected unseen.
+
+    Args:
+        player (Character): the player.
+        obstacles (ObstaclePool): the obstacles, ordered by x.
+
+    Yields:
+        Obstacle: the obstacles that need a mask test.
+    """
+    bounds = player_bounds(player)
+    bounds.union_ip(player.frame.bounds.move(player.previous))
+    visited = 0
+    for o in obstacles:
+        visited += 1
+        left = min(o.rect.x, o.previous[0])
+        if left >= bounds.right:
+            counters.broad_rejects += len(obstacles) - visited + 1
+            return
+        right = max(o.rect.x, o.previous[0]) + o.rect.width
+        top = min(o.rect.y, o.previous[1])
+        bottom = max(o.rect.y, o.previous[1]) + o.rect.height
+        if right <= bounds.x or top >= bounds.bottom or bottom <= bounds.y:
+            counters.broad_rejects += 1
+            continue
+        counters.narrow_tests += 1
+        yield o
+
+def overlap_interval(start, velocity, low, high):
+    """ Returns the part of the tick during which start + t * velocity lies strictly between low and high.
+
+    Args:
+        start (float): the value at the start of the tick.
+        velocity (float): the change in value over the whole tick.
+        low (float): the lower bound.
+        high (float): the upper bound.
+
+    Returns:
+        tuple: the (enter, exit) times as fractions of the tick. enter >= exit when never inside.
+    """
+    if velocity == 0:
+        return (0, 1) if low < start < high else (1, 0)
+    enter = (low - start) / velocity
+    exit = (high - start) / velocity
+    if enter > exit:
+        enter, exit = exit, enter
+    return max(enter, 0), min(exit, 1)
+
+def swept_hit(player, obstacle):
+    """ Narrow phase: tests whether the player's and an obstacle's masks touched at any point during the last tick.
+
+    Both are assumed to move in a straight line from their previous positions. A
+    swept AABB test between the player's opaque bounds and the obstacle finds the
+    time of impact and the time they separate; the masks are only compared along
+    that stretch, at least once per pixel of relative movement. A pair the swept
+    test clears skips the mask test entirely.
+
+    Args:
+        player (Character): the player.
+        obstacle (Obstacle): the obstacle.
+
+    Returns:
+        bool: True if the masks overlapped during the tick.
+    """
+    #obstacle position relative to the player's rect at the start and end of the tick
+    x0 = obstacle.previous[0] - player.previous[0]
+    y0 = obstacle.previous[1] - player.previous[1]
+    vx = obstacle.rect.x - player.rect.x - x0
+    vy = obstacle.rect.y - player.rect.y - y0
+
+    bounds = player.frame.bounds
+    enter_x, exit_x = overlap_interval(x0, vx, bounds.x - obstacle.rect.width, bounds.right)
+    enter_y, exit_y = overlap_interval(y0, vy, bounds.y - obstacle.rect.height, bounds.bottom)
+    enter = max(enter_x, enter_y)
+    exit = min(exit_x, exit_y)
+    if enter >= exit:
+        counters.swept_clears += 1
+        return False
+
+    steps = max(1, math.ceil(max(abs(vx), abs(vy)) * (exit - enter)))
+    for i in range(steps + 1):
+        t = enter + (exit - enter) * i / steps
+        if player.frame.mask.overlap(obstacle.frame.mask, (round(x0 + vx * t), round(y0 + vy * t))):
+            return True
+    return False
+
+counters = CollisionCounters()
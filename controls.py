@@ -0,0 +1,123 @@
+import time
+import pygame
+
+#input bits of a per-tick input snapshot.
+JUMP = 1
+DESCEND = 2
+START = 4
+HELD = JUMP | DESCEND | START # the bits that are down during the tick.
+
+#edge flags, the same bits shifted: pressed or released since the previous snapshot.
+PRESSED_SHIFT = 3
+RELEASED_SHIFT = 6
+
+KEYS = {pygame.K_SPACE: JUMP | START, pygame.K_UP: JUMP, pygame.K_DOWN: DESCEND} # the bits each key sets.
+
+def pressed(inputs):
+    """ Returns the bits pressed since the previous snapshot.
+
+    Args:
+        inputs (int): an input snapshot.
+
+    Returns:
+        int: a bitfield of JUMP, DESCEND and START.
+    """
+    return (inputs >> PRESSED_SHIFT) & HELD
+
+def released(inputs):
+    """ Returns the bits released since the previous snapshot.
+
+    Args:
+        inputs (int): an input snapshot.
+
+    Returns:
+        int: a bitfield of JUMP, DESCEND and START.
+    """
+    return (inputs >> RELEASED_SHIFT) & HELD
+
+class Input:
+    def __init__(self, keys=KEYS):
+        """ Turns keyboard events into one input snapshot per simulation tick.
+
+        Events are fed in as they are drained from the queue, and every tick takes a
+        snapshot: the held bits, plus the pressed and released edge flags shifted by
+        PRESSED_SHIFT and RELEASED_SHIFT. A key pressed and released between two
+        snapshots still shows as held in the next one, so quick taps are never lost.
+
+        Args:
+            keys (dict): maps pygame key codes to the bits they set.
+        """
+        self.keys = keys
+        self.__down = {} # key code to bits, for the mapped keys that are down.
+        self.__latched = 0
+        self.__pressed = 0
+        self.__released = 0
+        self.__press_time = None # when the oldest press no snapshot has taken yet was drained.
+        self.__taken_time = None # when the oldest press a snapshot has taken but no frame has presented yet was drained.
+
+    def held(self):
+        """ Returns the bits of the keys that are down.
+
+        Returns:
+            int: a bitfield of JUMP, DESCEND and START.
+        """
+        bits = 0
+        for b in self.__down.values():
+            bits |= b
+        return bits
+
+    def handle(self, event):
+        """ Updates the key state from an event.
+
+        Args:
+            event (pygame.event.Event): an event drained from the queue.
+
+        Returns:
+            bool: True if the event was a mapped key or released every key.
+        """
+        if event.type == pygame.KEYDOWN and event.key in self.keys:
+            before = self.held()
+            self.__down[event.key] = self.keys[event.key]
+            new = self.held() & ~before
+            self.__latched |= new
+            self.__pressed |= new
+            if new and self.__press_time is None:
+                self.__press_time = time.perf_counter()
+            return True
+        if event.type == pygame.KEYUP and event.key in self.__down:
+            before = self.held()
+            del self.__down[event.key]
+            self.__released |= before & ~self.held()
+            return True
+        if event.type == pygame.WINDOWFOCUSLOST and self.__down:
+            #key up events are not delivered to an unfocused window
+            self.__released |= self.held()
+            self.__down.clear()
+            return True
+        return False
+
+    def snapshot(self):
+        """ Takes the input snapshot of one tick and clears the edge flags.
+
+        Returns:
+            int: the held bits, with the pressed and released edge flags above them.
+        """
+        inputs = (self.held() | self.__latched) | (self.__pressed << PRESSED_SHIFT) | (self.__released << RELEASED_SHIFT)
+        self.__latched = self.__pressed = self.__released = 0
+        if self.__press_time is not None and self.__taken_time is None:
+            self.__taken_time = self.__press_time
+            self.__press_time = None
+        return inputs
+
+    def presented(self):
+        """ Called once a frame has been presented, to measure input latency.
+
+        Returns:
+            float: milliseconds from draining the oldest press a tick has taken since the
+            last call to now, or None if no tick has taken a press.
+        """
+        if self.__taken_time is None:
+            return None
+        latency = (time.perf_counter() - self.__taken_time) * 1000
+        self.__taken_time = None
+        return latency
@@ -0,0 +1,101 @@
+""" Spreads headless game episodes across a pool of worker processes.
+
+Every episode gets its own random generator seeded from the base seed and the
+episode's index, so results do not depend on which worker runs it or in which
+order. Results stream back as each episode completes. Run from the repository root:
+
+    python episodes.py --episodes 1000 --seed 7
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import headless
+import controls
+import simulation
+
+def episode_seed(seed, index):
+    """ Derives the seed of a single episode.
+
+    Args:
+        seed (int): the base seed of the whole batch.
+        index (int): the index of the episode within the batch.
+
+    Returns:
+        String: a seed accepted by random.Random.
+    """
+    return "{}:{}".format(seed, index)
+
+def play(task):
+    """ Plays a single episode. Runs inside a worker process.
+
+    Args:
+        task (tuple): the episode index, base seed, policy and maximum number of ticks.
+
+    Returns:
+        dict: the episode's score, length in ticks and simulation step timings.
+    """
+    index, seed, policy, max_ticks = task
+    sim = simulation.Simulation(episode_seed(seed, index))
+    sim.step(controls.START)
+    timings = []
+    while sim.state == "playing" and sim.ticks < max_ticks:
+        inputs = policy(sim)
+        start = time.perf_counter()
+        sim.step(inputs)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {
+        "index": index,
+        "score": sim.scoreboard.getScore(),
+        "ticks": sim.ticks,
+        "mean_ms": sum(timings) / len(timings) * 1000 if timings else 0,
+        "p99_ms": timings[int(len(timings) * 0.99)] * 1000 if timings else 0,
+        "max_ms": timings[-1] * 1000 if timings else 0,
+        "worker": os.getpid(),
+    }
+
+def run(episodes, policy=headless.simple_policy, seed=0, processes=None, max_ticks=100000):
+    """ Plays episodes on a worker pool, yielding each result as soon as it completes.
+
+    Args:
+        episodes (int): the number of episodes to play.
+        policy (function): called with the simulation each tick, returns the input snapshot.
+        It replaces the keyboard, and must be picklable (a module-level function).
+        seed (int): the base seed of the batch.
+        processes (int): the number of workers. Defaults to one per core.
+        max_ticks (int): episodes are cut off after this many ticks.
+
+    Yields:
+        dict: the result of an episode, see play. Results arrive in completion order.
+    """
+    tasks = ((index, seed, policy, max_ticks) for index in range(episodes))
+    #forking a process that has already initialised SDL can deadlock, so workers are spawned.
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        for result in pool.imap_unordered(play, tasks):
+            yield result
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless game episodes on all cores.")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--max-ticks", type=int, default=100000)
+    parser.add_argument("--verbose", action="store_true", help="print every episode as it completes")
+    args = parser.parse_args()
+
+    scores = []
+    ticks = 0
+    start = time.perf_counter()
+    for result in run(args.episodes, headless.simple_policy, args.seed, args.processes, args.max_ticks):
+        scores.append(result["score"])
+        ticks += result["ticks"]
+        if args.verbose:
+            print("episode {index}: score {score}, {ticks} ticks, step mean {mean_ms:.3f} ms, p99 {p99_ms:.3f} ms".format(**result))
+    elapsed = time.perf_counter() - start
+    print("{} episodes in {:.2f}s ({:.0f} episodes/s, {:.0f} ticks/s), mean score {:.2f}, best {}".format(
+        len(scores), elapsed, len(scores) / elapsed, ticks / elapsed, sum(scores) / max(len(scores), 1), max(scores, default=0)))
+
+if __name__ == "__main__":
+    main()
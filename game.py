@@ -1,12 +1,25 @@
 import pygame
 import math
 import random
-import character
-import block
 import score
 import obstacle
-import time
 import os
+import time
+import socket
+import controls
+import simulation
+import assets
+import audio
+import text
+import render
+import collision
+import replay
+import profiler
+import preload
+import level
+import atlas
+import pacing
+import leaderboard
 
 def load_sprite_sheet(folder, action):
     """ Loads a sprite sheet image
@@ -18,7 +31,7 @@ def load_sprite_sheet(folder, action):
     Returns:
         pygame.image: returns the sprite sheet as a pygame image.
     """
-    sprite_sheet = pygame.image.load(folder + "/" + action + ".png").convert_alpha()
+    sprite_sheet = assets.image(folder + "/" + action + ".png")
     
     return sprite_sheet
 
@@ -74,44 +87,66 @@ def load_background(background_name, screen_width):
         tiles (int): the number of background tiles to blit.
         bg_width (int): the width of the background image.
     """
-    background = pygame.image.load(background_name).convert_alpha()
+    background = assets.image(background_name, alpha=None)
     bg_width = background.get_width()
     tiles = math.ceil(screen_width / bg_width) + 1 #so that this will work with any size background image.
     
     return background, tiles, bg_width
         
-def load_obstacles(obstacles, dist_between_blocks):
+def obstacle_frame(kind):
+    """ Returns the frame of a kind of obstacle.
+
+    Args:
+        kind (int): an index into OBSTACLE_KINDS.
+
+    Returns:
+        Frame: the obstacle's surface and mask.
+    """
+    area, scale = OBSTACLE_KINDS[kind]
+    return assets.tile("terrain", "Terrain", area, scale)
+
+def load_obstacles(obstacles, speed=0):
     """ Obstacle generation and deletion.
 
+    Obstacles that have scrolled off-screen are returned to the pool, and the next spawns
+    of the pool's level are placed once they come within two ticks of movement of the right
+    edge, each at its gap from the obstacle before it. The gap is measured from the pool's
+    cursor, which keeps scrolling after that obstacle despawns, so gaps wider than the
+    screen are kept too. They are still off-screen after this tick's move, so they always
+    scroll in from the right.
+
     Args:
-        obstacles (list): a list of type Obstacle
-        dist_between_blocks (int): the distance between each subsequent obstacle.
+        obstacles (ObstaclePool): the obstacles in the game.
+        speed (float): the change in x-position of the obstacles this tick, see level.speed.
 
     Returns:
-        list: a list of the new obstacles to be generated in the game.
+        ObstaclePool: the obstacles in the game.
     """
-    for o in obstacles:
-        if o.rect.x + 100 < 0:
-            obstacles.remove(o)
-            rand = random.randint(SCREEN_WIDTH, SCREEN_WIDTH + dist_between_blocks)
-            obstacles.append(obstacle.Obstacle(rand, SCREEN_HEIGHT - GROUND_BLOCK_HEIGHT - OBSTACLE_HEIGHT, OBSTACLE_WIDTH, OBSTACLE_HEIGHT, OBSTACLE_SPEED))
+    obstacles.despawn(-100)
+    limit = SCREEN_WIDTH - 2 * speed
+    x = int(limit) if obstacles.cursor is None else obstacles.cursor + obstacles.level.peek()[0]
+    while x <= limit:
+        if obstacles.spawn(x, obstacle_frame(obstacles.level.peek()[1])) is None:
+            break #the pool is full, the spawn stays next in the level.
+        obstacles.level.pop()
+        x = obstacles.cursor + obstacles.level.peek()[0]
             
     return obstacles
 
-def return_game_state(obstacles, player, game_state):
+def return_game_state(obstacles, player, game_state, inputs):
     """ Monitors the state of the game (start, playing, game_over)
 
     Args:
-        obstacles (list): A list of the currently present in the game.
+        obstacles (ObstaclePool): The obstacles currently present in the game.
         player (Player): The player of the game.
         game_state (String): The current state of the game
+        inputs (int): the input snapshot for this tick.
 
     Returns:
         String: The new state of the game.
     """
     if game_state == "start":
-        if pygame.key.get_pressed()[pygame.K_SPACE]:
-            pygame.mixer.music.unload()
+        if inputs & controls.START:
             return "playing"
         else:
             return "start"
@@ -119,9 +154,9 @@ def return_game_state(obstacles, player, game_state):
     if game_state == "game_over":
         return "game_over"
         
-    for o in obstacles:
+    for o in collision.sweep(player, obstacles):
         if o.collision(player):
-            sound_effect("die.wav")
+            collision.counters.hits += 1
             return "game_over"
     return "playing"
     
@@ -132,105 +167,113 @@ def draw(screen, ground, player, obstacles, scoreboard, game_state, space_bar, s
         screen (pygame.display): The display
         ground (list): A list of blocks representing the ground.
         player (Player): The player
-        obstacles (list): A list of type Obstacles.
+        obstacles (ObstaclePool): The obstacles to draw.
         scoreboard (Scoreboard): The scoreboard
         game_state (String): The current state of the game.
         space_bar (pygame.Surface): Surface of the spacebar image. 
-        start_menu_font (pygame.font): Font for the text in the starting screen.
+        start_menu_font (String): Font file for the text in the starting screen.
+
+    Returns:
+        list: the rects of the screen that were drawn on.
     """
-    for g in ground:
-        g.draw(screen)
+    rects = [g.draw(screen) for g in ground]
         
     if game_state == "start":
         start_menu_text = "Press Space to Start"
-        start_menu_font = pygame.font.Font("fonts/" + start_menu_font, 20)
-        start_menu_surface = start_menu_font.render(start_menu_text, True, (0,0,0))
+        start_menu_surface = text.render(start_menu_font, 20, start_menu_text, BLACK)
         start_menu_surface_rect = start_menu_surface.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 140))
-        screen.blit(start_menu_surface, start_menu_surface_rect)
+        rects.append(screen.blit(start_menu_surface, start_menu_surface_rect))
         space_bar_rect = space_bar.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 50))
-        screen.blit(space_bar, space_bar_rect)
+        rects.append(screen.blit(space_bar, space_bar_rect))
         
     if game_state != "start":
-        player.draw(screen)
-        screen.blit(scoreboard.getText(), (scoreboard.rect.x, scoreboard.rect.y))
+        rects.append(player.draw(screen))
+        rects.append(screen.blit(scoreboard.getText(), (scoreboard.rect.x, scoreboard.rect.y)))
         for obstacle in obstacles:
-            obstacle.draw(screen)
+            rects.append(obstacle.draw(screen))
+
+    return rects
 
 def game_over_text(scoreboard):
     """ Draws the text for the game over screen
 
     Args:
         scoreboard (Scoreboard): The scoreboard.
+
+    Returns:
+        list: the rects of the screen that were drawn on.
     """
-    game_over_font = pygame.font.Font("fonts/font1.ttf", 20)
-    game_over_text = game_over_font.render("You Scored: {}".format(scoreboard.score), True, (0,0,0))
+    game_over_text = text.number_label("font1.ttf", 20, "You Scored: ", BLACK)
+    game_over_text.set(scoreboard.score)
     game_over_text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 60))
-    play_again_text = game_over_font.render("Press the Spacebar to play again.", True, (0,0,0))
+    best_text = text.number_label("font1.ttf", 20, "Best: ", BLACK)
+    best_text.set(scoreboard.best)
+    best_text_rect = best_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 30))
+    play_again_text = text.render("font1.ttf", 20, "Press the Spacebar to play again.", BLACK)
     play_again_text_rect = play_again_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-    screen.blit(game_over_text, game_over_text_rect)
-    screen.blit(play_again_text, play_again_text_rect)
+    rects = [game_over_text.draw(screen, game_over_text_rect), best_text.draw(screen, best_text_rect), screen.blit(play_again_text, play_again_text_rect)]
+    if scoreboard.rank is not None:
+        rank_text = text.render("font1.ttf", 20, "Leaderboard rank {} of {}".format(*scoreboard.rank), BLACK)
+        rects.append(screen.blit(rank_text, rank_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 30))))
+    return rects
     
 def update_score(scoreboard, obstacles, player):
     """ Updates the score of the scoreboard
 
     Args:
         scoreboard (Scoreboard): The scoreboard.
-        obstacles (list): list of type Obstacle.
+        obstacles (ObstaclePool): the obstacles in the game.
         player (Player): the player.
     """
-    for o in obstacles:
-        if o.rect.x + OBSTACLE_WIDTH < player.rect.x and not o.getSeen():
+    passed = obstacles.count_passed(player.rect.x)
+    if passed:
+        for _ in range(passed):
             scoreboard.incrementScore()
-            if scoreboard.getScore() % 10 == 0:
-                sound_effect("point.wav")
-            scoreboard.updateText()
-            o.setSeen(True)
+        scoreboard.updateText()
 
-def move(player, obstacles, scoreboard, ground, game_state):
-    """ Moves all components
+def move(player, obstacles, scoreboard, ground, game_state, inputs):
+    """ Moves all components by one simulation tick.
 
     Args:
         player (Player): The player
-        obstacles (list): list of type Obstacle.
+        obstacles (ObstaclePool): the obstacles in the game.
         scoreboard (Scoreboard): the Scoreboard
-        ground (list): list of type Block representing the ground.
+        ground (Ground): the ground strip the player lands on.
         game_state (String): The current state of the game.
+        inputs (int): the input snapshot for this tick.
+
+    Returns:
+        bool: True if the player jumped during this tick.
     """
     if game_state == "playing":
-        for o in obstacles:
-            o.setSpeed((-(scoreboard.getScore() + 30) // 10) - scoreboard.getScore() / 10)
-            o.move()
-        player.loop(60, ground)
+        score = scoreboard.getScore()
+        obstacles.move(level.speed(score))
+        return player.loop(simulation.TICK_RATE, ground, inputs)
+    return False
 
-def reset_game(player, scoreboard):
+def reset_game(player, scoreboard, rng=random, obstacles=None):
     """ Resets the game
 
     Args:
         player (Player): the Player of the game.
         scoreboard (Scoreboard): The scoreboard.
+        rng (random.Random): the random generator the seed of the new level is drawn from.
+        obstacles (ObstaclePool): the pool to reuse. A new one is created when omitted.
 
     Returns:
-        list: the starting list of type Obstacle.
+        ObstaclePool: the starting obstacles.
     """
     player.rect.x, player.rect.y = PLAYER_START_X, PLAYER_START_Y
+    player.previous = player.rect.topleft
     scoreboard.score = 0
-    obstacles = [obstacle.Obstacle(SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_BLOCK_HEIGHT - OBSTACLE_HEIGHT, OBSTACLE_WIDTH, OBSTACLE_HEIGHT, OBSTACLE_SPEED), 
-                 obstacle.Obstacle(SCREEN_WIDTH + random.randint(RAND_DIST_BETWEEN_BLOCKS[0], RAND_DIST_BETWEEN_BLOCKS[1]), 
-                          SCREEN_HEIGHT - GROUND_BLOCK_HEIGHT - OBSTACLE_HEIGHT, OBSTACLE_WIDTH, OBSTACLE_HEIGHT, OBSTACLE_SPEED)]
+    if obstacles is None:
+        obstacles = obstacle.ObstaclePool(OBSTACLE_POOL_SIZE, SCREEN_HEIGHT - GROUND_BLOCK_HEIGHT - OBSTACLE_HEIGHT, OBSTACLE_WIDTH, OBSTACLE_HEIGHT, OBSTACLE_SPEED)
+    obstacles.clear()
+    obstacles.level = level.Level(rng.getrandbits(64), RAND_DIST_BETWEEN_BLOCKS, len(OBSTACLE_KINDS))
+    load_obstacles(obstacles, level.speed(0))
     
     return obstacles
 
-def lobby_music(music, volume):
-    """ Plays the lobby music.
-
-    Args:
-        music (String): The name of the music file.
-        volume (int): The volume as a ratio of the original volume
-    """
-    pygame.mixer.music.load("sounds/" + music + ".mp3")
-    pygame.mixer.music.play(-1)
-    pygame.mixer.music.set_volume(volume)
-    
 def spacebar_animation(spacebar, x, y, width, height):
     """ Creates a surface for the starting page spacebar
 
@@ -249,89 +292,286 @@ def spacebar_animation(spacebar, x, y, width, height):
     space_bar_surface.blit(spacebar, (0, 0), (x, y, width, height))
     return space_bar_surface
 
-def sound_effect(sound_effect):
-    """ Plays the sound effects for the game.
+def preload_jobs():
+    """ Lists every file the game loads, so that they can be preloaded before a run starts.
+
+    The files the start screen shows come first.
+
+    Returns:
+        list: (kind, path) jobs for preload.Preloader.
+    """
+    jobs = [("file", "fonts/font1.ttf"), ("image", BACKGROUND)]
+    if assets.atlas is None or any(key not in assets.atlas for key, _, _ in atlas.sources()):
+        #an atlas built before a frame was added falls back to the sheets
+        jobs += [("sheet", "other/space_bar.png"), ("sheet", "terrain/Terrain.png")]
+        jobs += [("sheet", "sprites/" + action + ".png") for action in ("run", "jump", "fall")]
+    if pygame.mixer.get_init() is not None:
+        jobs += [("sound", "sounds/" + file) for file in SOUND_EFFECTS.values()]
+        jobs.append(("file", "sounds/" + LOBBY_MUSIC + ".mp3"))
+    return jobs
+
+def loading_screen(progress):
+    """ Draws the start screen with whatever has been loaded so far, and a progress bar in place of the space bar.
 
     Args:
-        sound_effect (File): The file name of the sound effect.
+        progress (float): the fraction of files loaded.
     """
-    pygame.mixer.music.unload()
-    pygame.mixer.music.load("sounds/" + sound_effect)
-    pygame.mixer.music.play()
-
-os.environ['SDL_VIDEO_CENTERED'] = '1'
-pygame.init()
-INFO = pygame.display.Info()
-SCREEN_WIDTH = INFO.current_w * 0.5
-SCREEN_HEIGHT = INFO.current_h * 0.5
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption('Endless Running Game')
+    if BACKGROUND in assets.images:
+        background, tiles, bg_width = load_background(BACKGROUND, SCREEN_WIDTH)
+        for i in range(tiles):
+            screen.blit(background, (i * bg_width, 0))
+    else:
+        screen.fill(LOADING_COLOR)
+
+    if "fonts/font1.ttf" in assets.files:
+        start_menu_surface = text.render("font1.ttf", 20, "Press Space to Start", BLACK)
+        screen.blit(start_menu_surface, start_menu_surface.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 140)))
+
+    bar = pygame.Rect(0, 0, SPACE_BAR_DIMENSIONS[2], 16)
+    bar.center = (SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 50)
+    pygame.draw.rect(screen, BLACK, (bar.x, bar.y, bar.width * progress, bar.height))
+    pygame.draw.rect(screen, BLACK, bar, 2)
+
+class Config:
+    def __init__(self, screen_size=None, audio=True, **constants):
+        """ Settings applied by init.
+
+        Args:
+            screen_size (tuple): the (width, height) of the window. Defaults to half the desktop size.
+            audio (bool): whether to initialise the mixer.
+            constants: overrides for this module's constants, e.g. OBSTACLE_SPEED=8.
+        """
+        self.screen_size = screen_size
+        self.audio = audio
+        self.constants = constants
+
+def init(config=None):
+    """ Initialises pygame, opens the window and applies the config.
+
+    Nothing is initialised when this module is imported, so the entity classes and
+    helpers can be imported without a display. Calling init again without a config
+    keeps the current window.
+
+    Args:
+        config (Config): the settings to apply. Defaults to Config().
+
+    Returns:
+        pygame.Surface: the surface the game draws on.
+    """
+    global SCREEN_WIDTH, SCREEN_HEIGHT, screen, framebuffer
+    if config is None:
+        if screen is not None:
+            return screen
+        config = Config()
+
+    for name, value in config.constants.items():
+        if not name.isupper() or name not in globals():
+            raise ValueError("unknown constant: " + name)
+        globals()[name] = value
+
+    os.environ['SDL_VIDEO_CENTERED'] = '1'
+    if config.audio:
+        pygame.init()
+    else:
+        pygame.display.init()
+        pygame.font.init()
+
+    if config.screen_size is None:
+        info = pygame.display.Info()
+        SCREEN_WIDTH = info.current_w * 0.5
+        SCREEN_HEIGHT = info.current_h * 0.5
+    else:
+        SCREEN_WIDTH, SCREEN_HEIGHT = config.screen_size
+    if LOGICAL_SIZE is None:
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        framebuffer = None
+    else:
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+        SCREEN_WIDTH, SCREEN_HEIGHT = LOGICAL_SIZE
+        framebuffer = render.ScaledDisplay(LOGICAL_SIZE, LOGICAL_INTEGER_SCALE)
+        screen = framebuffer.surface
+    pygame.display.set_caption('Endless Running Game')
+    assets.load_atlas(ATLAS_PATH) #also drops surfaces converted for a previous display.
+    return screen
+
+#set by init
+SCREEN_WIDTH = None
+SCREEN_HEIGHT = None
+screen = None # the surface the game draws on, the display surface unless LOGICAL_SIZE is set.
+framebuffer = None # the render.ScaledDisplay presenting screen when LOGICAL_SIZE is set.
 
 #constants
 BLACK = (0, 0, 0)
-RAND_DIST_BETWEEN_BLOCKS = [250, 500] # [start, end]
+RAND_DIST_BETWEEN_BLOCKS = [250, 500] # [start, end] at the starting speed, scaled with the speed, see the level module.
 GROUND_BLOCK_HEIGHT, GROUND_BLOCK_WIDTH = 96, 96
 PLAYER_START_X, PLAYER_START_Y = 100, 200
 PLAYER_WIDTH, PLAYER_HEIGHT = 32, 32
 PLAYER_MAX_HEIGHT = 100 # y_pos of player at highest point of jump.
 OBSTACLE_WIDTH, OBSTACLE_HEIGHT = 25, 48
 OBSTACLE_SPEED = 5
+OBSTACLE_POOL_SIZE = 16 # the most obstacles that can be in the game at once.
+OBSTACLE_KINDS = [((240, 0, 16, 48), 0.5), ((240, 64, 16, 48), 0.5), ((208, 16, 32, 32), 0.5), ((192, 144, 16, 16), 1)] # (area of Terrain.png, scale) of each kind of obstacle.
 SCOREBOARD_WIDTH, SCOREBOARD_HEIGHT = 100, 25
 SCOREBOARD_X, SCOREBOARD_Y = 650, 25
+LOBBY_MUSIC = "runner_game_music"
 LOBBY_MUSIC_VOLUME = 0.1
+BACKGROUND = "backgrounds/nature.jpeg"
+LOADING_COLOR = (158, 213, 233) # shown until the background has loaded.
 SPACE_BAR_DIMENSIONS = [135, 230, 318, 120] # [x, y, width, height]
-GAME_OVER_BUFFER = 0.5 # wait time after game is over.
+GAME_OVER_BUFFER = 0.5 # time after the game is over during which it cannot be restarted.
+REFRESH_RATE = 60 # frames drawn per second, independent of simulation.TICK_RATE. Match the display, e.g. 120 or 144. 0 draws as fast as possible.
+MAX_FRAME_TIME = 0.25 # longest frame the simulation will catch up on.
+MAX_SKIPPED_FRAMES = 4 # most frames left undrawn in a row while the simulation catches up.
+FRAME_SPIN = 0.002 # seconds before a frame is due that the loop stops sleeping and spins, for precise pacing. 0 only sleeps.
+SOUND_EFFECTS = {"jump": "jump.wav", "point": "point.wav", "die": "die.wav"}
+SOUND_CHANNELS = 4 # channels reserved for sound effects.
+SOUND_EFFECT_INTERVAL = 0.1 # shortest time between two plays of the same sound effect.
+DIRTY_RECTS = False # only redraw and push the areas that changed each frame.
+LOGICAL_SIZE = None # (width, height) to draw the game at, scaled to fit a resizable window. None draws at the window size.
+LOGICAL_INTEGER_SCALE = False # only scale the logical size by whole factors, for pixel-exact output.
+ATLAS_PATH = "atlas/atlas.json" # texture atlas built by the atlas module, the sheets are decoded when it is missing.
+RECORD_PATH = None # file the session's inputs are recorded to, see the replay module.
+PROFILE = False # time the stages of every frame, see the profiler module.
+PROFILE_OVERLAY = False # draw the FPS and stage timings on screen. Implies PROFILE.
+LEADERBOARD_ADDRESS = None # (host, port) of a shared leaderboard server, see the leaderboard module. None plays offline.
+CABINET_NAME = None # name this cabinet submits scores under, the host name when None.
+SCORE_LOG_PATH = "scores/scores.log" # file every finished session is appended to, see score.ScoreLog. None keeps no history.
+PROFILE_PATH = None # file the stage timings are written to on quit, .json for a Chrome trace and CSV otherwise. Implies PROFILE.
+
+#constants that change how a seed plays out, stored in every recording, see the replay module
+SIMULATION_CONSTANTS = ("RAND_DIST_BETWEEN_BLOCKS", "GROUND_BLOCK_HEIGHT", "GROUND_BLOCK_WIDTH", "PLAYER_START_X", "PLAYER_START_Y", "PLAYER_WIDTH", "PLAYER_HEIGHT",
+                        "OBSTACLE_WIDTH", "OBSTACLE_HEIGHT", "OBSTACLE_SPEED", "OBSTACLE_POOL_SIZE", "OBSTACLE_KINDS")
         
-def main():
+def main(config=None):
     #object initialisation
-    clock = pygame.time.Clock()
+    init(config)
+    scheduler = pacing.FrameScheduler(REFRESH_RATE, simulation.TICK, MAX_FRAME_TIME, MAX_SKIPPED_FRAMES, FRAME_SPIN)
+    assets.seal(False)
+
+    #show the start screen while the files load in the background
+    preloader = preload.Preloader(preload_jobs())
+    while not preloader.done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+        loading_screen(preloader.poll())
+        if framebuffer is not None:
+            framebuffer.update()
+        else:
+            pygame.display.update()
+        scheduler.wait()
+
     running = True
-    player = character.Character(PLAYER_START_X, PLAYER_START_Y, PLAYER_WIDTH, PLAYER_HEIGHT)
-    ground = [block.Block(b, int(SCREEN_HEIGHT) - GROUND_BLOCK_HEIGHT, GROUND_BLOCK_WIDTH, GROUND_BLOCK_HEIGHT) for b in range(0, int(SCREEN_WIDTH), GROUND_BLOCK_WIDTH)]
-    obstacles = [obstacle.Obstacle(SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_BLOCK_HEIGHT - OBSTACLE_HEIGHT, OBSTACLE_WIDTH, OBSTACLE_HEIGHT, OBSTACLE_SPEED), 
-                 obstacle.Obstacle(SCREEN_WIDTH + random.randint(RAND_DIST_BETWEEN_BLOCKS[0], RAND_DIST_BETWEEN_BLOCKS[1]), 
-                          SCREEN_HEIGHT - GROUND_BLOCK_HEIGHT - OBSTACLE_HEIGHT, OBSTACLE_WIDTH, OBSTACLE_HEIGHT, OBSTACLE_SPEED)]
-    scoreboard = score.Scoreboard(SCREEN_WIDTH - (2 * SCOREBOARD_WIDTH), SCOREBOARD_Y + 10, SCOREBOARD_WIDTH, SCOREBOARD_HEIGHT, 20)
-    background, tiles, bg_width = load_background("backgrounds/nature.jpeg", SCREEN_WIDTH)
-    game_state = "start"
-    spacebar = pygame.transform.scale_by(load_sprite_sheet("other", "space_bar"), 0.5)
-    spacebar_surface = spacebar_animation(spacebar, SPACE_BAR_DIMENSIONS[0], SPACE_BAR_DIMENSIONS[1], SPACE_BAR_DIMENSIONS[2], SPACE_BAR_DIMENSIONS[3]) 
-    lobby_music("runner_game_music", LOBBY_MUSIC_VOLUME)
+    seed = random.randrange(2 ** 63)
+    sim = simulation.Simulation(seed)
+    recorder = replay.Recorder(RECORD_PATH, seed, screen.get_size()) if RECORD_PATH else None
+    scores = score.ScoreLog(SCORE_LOG_PATH) if SCORE_LOG_PATH else None
+    writer = score.ScoreWriter(scores) if scores is not None else None
+    sim.scoreboard.best = scores.best() if scores is not None else 0
+    board = leaderboard.Client(LEADERBOARD_ADDRESS, CABINET_NAME or socket.gethostname()) if LEADERBOARD_ADDRESS else None
+    submission = None # id of the last run submitted to the leaderboard.
+    run_start = 0 # tick the current run started on.
+    background, tiles, bg_width = load_background(BACKGROUND, SCREEN_WIDTH)
+    spacebar_surface = assets.cutout("other", "space_bar", 0.5, SPACE_BAR_DIMENSIONS, BLACK).surface
+    mixer = audio.Mixer(SOUND_EFFECTS, SOUND_CHANNELS, SOUND_EFFECT_INTERVAL)
+    mixer.music(LOBBY_MUSIC, LOBBY_MUSIC_VOLUME)
+    static = render.static_layer(screen.get_size(), background, tiles, bg_width, sim.ground)
+    renderer = render.DirtyRenderer(screen, static, framebuffer or pygame.display) if DIRTY_RECTS else None
+    timings = profiler.Profiler() if PROFILE or PROFILE_OVERLAY or PROFILE_PATH else None
+    sim.profiler = timings
 
     #game loop
+    keyboard = controls.Input()
+    scheduler.reset() #the loading screen's time is not owed to the simulation.
     while running:
+        #wait first, so the events drained below are as fresh as possible when the ticks read them
+        scheduler.wait()
+        if timings is not None:
+            timings.mark("clock")
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            else:
+                keyboard.handle(event)
+        if timings is not None:
+            timings.mark("events")
+
+        #run as many fixed simulation ticks as the elapsed time calls for
+        while scheduler.step():
+            inputs = keyboard.snapshot()
+            if scheduler.running("game_over"):
+                inputs &= ~controls.START #keep the game over screen up for the buffer.
+            sim.step(inputs)
+            if recorder is not None:
+                recorder.record(inputs)
+            for event in sim.events:
+                if event == "start":
+                    mixer.stop_music()
+                    assets.seal() #everything a run needs is in memory, make sure it stays that way.
+                    run_start = sim.ticks
+                elif event == "die":
+                    scheduler.after(GAME_OVER_BUFFER, "game_over")
+                    mixer.play(event)
+                    sim.scoreboard.best = max(sim.scoreboard.best, sim.scoreboard.getScore())
+                    if writer is not None:
+                        writer.submit(score.Session(time.time(), sim.scoreboard.getScore(), sim.ticks - run_start, sim.obstacles.level.seed))
+                    if board is not None:
+                        submission = board.submit(sim.scoreboard.getScore())
+                elif event == "restart":
+                    run_start = sim.ticks
+                    submission = sim.scoreboard.rank = None
+                else:
+                    mixer.play(event)
+        if timings is not None:
+            timings.mark("simulation")
+        if submission is not None:
+            sim.scoreboard.rank = board.rank(submission) #shown once the server has ranked the run, and kept current as other cabinets pass it.
+        if not scheduler.should_draw():
+            #behind schedule, go straight on to the next frame's ticks
+            if timings is not None:
+                timings.end_frame()
+            continue
         
-        game_state = return_game_state(obstacles, player, game_state)
-        
-        #draw background
-        for i in range(tiles):    
-            screen.blit(background, (i * bg_width, 0))
-
-        if game_state == "playing":
-            update_score(scoreboard, obstacles, player)
-            obstacles = load_obstacles(obstacles, RAND_DIST_BETWEEN_BLOCKS[1])    
-            move(player, obstacles, scoreboard, ground, game_state) 
-            
-        if game_state == "game_over":
-            game_over_text(scoreboard)
-            if pygame.key.get_pressed()[pygame.K_SPACE]:
-                time.sleep(GAME_OVER_BUFFER) #buffer after game is over so that game over screen is displayed properly.
-                player.set_y_vel(0)
-                player.set_fall_count(0)
-                player.falling = True
-                obstacles = reset_game(player, scoreboard)
-                game_state = "playing"
-                scoreboard.updateText()
-        
-        draw(screen, ground, player, obstacles, scoreboard, game_state, spacebar_surface, "font1.ttf")
-
-        pygame.display.update()
-           
-        clock.tick(60)
+        #draw background and ground, both part of the static layer
+        if renderer is not None:
+            renderer.begin()
+        else:
+            screen.blit(static, (0, 0))
+        if timings is not None:
+            timings.mark("background")
+
+        rects = game_over_text(sim.scoreboard) if sim.state == "game_over" else []
+        rects += draw(screen, [], sim.player, sim.obstacles, sim.scoreboard, sim.state, spacebar_surface, "font1.ttf")
+        if timings is not None:
+            timings.mark("draw")
+            if PROFILE_OVERLAY:
+                rects.append(timings.draw(screen))
+            timings.mark("profiler")
+
+        if renderer is not None:
+            renderer.present(rects)
+        elif framebuffer is not None:
+            framebuffer.update()
+        else:
+            pygame.display.update()
+        latency = keyboard.presented()
+        if timings is not None:
+            timings.mark("display")
+            if latency is not None:
+                timings.record_latency(latency)
+            timings.end_frame()
         
+    if recorder is not None:
+        recorder.close(sim.scoreboard.getScore())
+    if writer is not None:
+        writer.close()
+        scores.close()
+    if board is not None:
+        board.close()
+    if PROFILE_PATH:
+        timings.dump(PROFILE_PATH)
     pygame.quit()
 
 
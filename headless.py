@@ -0,0 +1,75 @@
+""" Runs the game simulation without a display or audio device.
+
+Importing this module selects SDL's dummy video and audio drivers, and stops SDL from
+turning SIGINT/SIGTERM into quit events so worker processes can be terminated. It must
+be imported before game.init is called. Run from the repository root:
+
+    python headless.py --runs 100
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+import argparse
+import time
+import controls
+import simulation
+
+JUMP_DISTANCE = 45 # how far ahead of the player simple_policy looks for obstacles.
+
+def simple_policy(sim):
+    """ Jumps whenever an obstacle is close in front of the player.
+
+    Args:
+        sim (Simulation): the simulation to decide an input for.
+
+    Returns:
+        int: the input snapshot for the next tick.
+    """
+    for o in sim.obstacles:
+        if 0 <= o.rect.x - sim.player.rect.right <= JUMP_DISTANCE:
+            return controls.JUMP
+    return 0
+
+def run_episode(policy=simple_policy, max_ticks=100000, sim=None, seed=None):
+    """ Plays a single run from the start screen until the player dies.
+
+    Args:
+        policy (function): called with the simulation each tick, returns the input snapshot.
+        max_ticks (int): the run is cut off after this many ticks.
+        sim (Simulation): a simulation to reuse. A new one is created when omitted.
+        seed (int): seed of the new simulation's random generator.
+
+    Returns:
+        tuple: the score and the number of ticks played.
+    """
+    if sim is None:
+        sim = simulation.Simulation(seed)
+        sim.step(controls.START)
+    else:
+        sim.restart()
+    ticks = 0
+    while sim.state == "playing" and ticks < max_ticks:
+        sim.step(policy(sim))
+        ticks += 1
+    return sim.scoreboard.getScore(), ticks
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless game episodes.")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--max-ticks", type=int, default=100000)
+    args = parser.parse_args()
+
+    sim = simulation.Simulation()
+    total_ticks = 0
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        _, ticks = run_episode(simple_policy, args.max_ticks, sim)
+        total_ticks += ticks
+    elapsed = time.perf_counter() - start
+    print("{} runs, {} ticks in {:.2f}s ({:.0f} runs/s, {:.0f} ticks/s)".format(args.runs, total_ticks, elapsed, args.runs / elapsed, total_ticks / elapsed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+""" A leaderboard shared by several cabinets on a LAN.
+
+The server ranks every score submitted to it and sends each cabinet the rank of its
+runs. Cabinets submit through Client, which keeps one connection open on a background
+thread so that the game loop never waits on the network. Run from the repository root:
+
+    python leaderboard.py serve --port 8765
+    python leaderboard.py load --clients 500 --local     # load test against a server in the same process
+
+and start the game with game.Config(LEADERBOARD_ADDRESS=("host", 8765)).
+
+Messages are little-endian structs that start with their type. A client opens with
+HELLO, naming its cabinet and a random nonce for this connection's submissions, then
+sends SUBMIT headers each followed by their ENTRY records. The server answers every
+entry with a RANK. When later scores move one of a connection's RECENT latest
+submissions down, the server sends its new RANK too, at most once every PUSH_INTERVAL.
+"""
+import argparse
+import asyncio
+import collections
+import heapq
+import random
+import struct
+import threading
+import time
+
+HELLO = struct.Struct("<B16sQ") # type, cabinet name, session nonce
+SUBMIT = struct.Struct("<BH") # type, number of entries that follow
+ENTRY = struct.Struct("<II") # submission id, score
+RANK = struct.Struct("<BIII") # type, submission id, rank, scores ranked
+HELLO_TYPE, SUBMIT_TYPE, RANK_TYPE = 1, 2, 3
+MAX_BATCH = 256 # most entries in one SUBMIT.
+MAX_SCORE = 1 << 20 # higher scores are ranked as this, which bounds the size of the tree.
+RECENT = 4 # latest submissions per connection kept up to date with pushed ranks.
+PUSH_INTERVAL = 0.25 # seconds between two rounds of pushed ranks.
+CLOSED_SESSIONS = 1024 # sessions remembered after disconnecting, for clients that reconnect and resend.
+PORT = 8765
+
+class Leaderboard:
+    def __init__(self, top=10):
+        """ Ranks scores as they are added, and keeps the best ones.
+
+        Counts of every score are kept in a Fenwick tree indexed by score, so adding a
+        score and finding the rank of one both take O(log S) for a highest score S.
+        The best scores are kept in a heap of top entries, O(log top) to add to.
+
+        Args:
+            top (int): the number of best scores kept.
+        """
+        self.top_size = top
+        self.total = 0
+        self.__tree = [0] * 1025 # score s is counted at index s + 1, the size is a power of two.
+        self.__top = [] # min-heap of (score, -order added, cabinet).
+
+    def __grow(self):
+        """ Doubles the scores the tree can count. The new last node covers every index, the other new nodes only empty ones.
+        """
+        size = len(self.__tree) - 1
+        self.__tree.extend([0] * size)
+        self.__tree[2 * size] = self.total
+
+    def add(self, score, cabinet=""):
+        """ Adds a score.
+
+        Args:
+            score (int): the score, clamped to MAX_SCORE.
+            cabinet (String): the cabinet the score was made on.
+
+        Returns:
+            int: the rank of the score, see rank.
+        """
+        score = min(score, MAX_SCORE)
+        while score + 1 >= len(self.__tree):
+            self.__grow()
+        tree = self.__tree
+        i = score + 1
+        while i < len(tree):
+            tree[i] += 1
+            i += i & -i
+        self.total += 1
+        entry = (score, -self.total, cabinet)
+        if len(self.__top) < self.top_size:
+            heapq.heappush(self.__top, entry)
+        elif entry > self.__top[0]:
+            heapq.heapreplace(self.__top, entry)
+        return self.rank(score)
+
+    def rank(self, score):
+        """ Returns the rank a score has among those added.
+
+        Args:
+            score (int): the score.
+
+        Returns:
+            int: one more than the number of higher scores, so equal scores share a rank.
+        """
+        i = min(score, MAX_SCORE) + 1
+        i = min(i, len(self.__tree) - 1)
+        at_most = 0
+        while i > 0:
+            at_most += self.__tree[i]
+            i &= i - 1
+        return self.total - at_most + 1
+
+    def top(self):
+        """ Returns the best scores.
+
+        Returns:
+            list: (score, cabinet) pairs, best first. Equal scores are in the order they were added.
+        """
+        return [(score, cabinet) for score, _, cabinet in sorted(self.__top, reverse=True)]
+
+class Server:
+    def __init__(self, leaderboard=None):
+        """ Serves a leaderboard to any number of cabinets from one asyncio event loop.
+
+        Args:
+            leaderboard (Leaderboard): the scores. A new one is created when omitted.
+        """
+        self.leaderboard = leaderboard or Leaderboard()
+        self.clients = 0
+        self.submissions = 0
+        self.__last = {} # (cabinet, nonce) of a connected session to the id of its last submission added.
+        self.__closed = collections.OrderedDict() # the same for disconnected sessions, oldest first.
+        self.__recent = {} # writer of every connection to its latest [submission, score, rank sent].
+        self.__moved = None # highest score added since the last round of pushed ranks, None when there is none due.
+
+    async def handle(self, reader, writer):
+        """ Ranks one cabinet's submissions until it disconnects.
+
+        Entries a client sends again after reconnecting are ranked without being added
+        twice, as long as the session is among the last CLOSED_SESSIONS to disconnect.
+        Replies are written once per SUBMIT, and the next one is only read once they
+        have drained, so a client that stops reading is no longer read from.
+
+        Args:
+            reader (asyncio.StreamReader): the connection's reader.
+            writer (asyncio.StreamWriter): the connection's writer.
+        """
+        self.clients += 1
+        session = None
+        recent = self.__recent[writer] = collections.deque(maxlen=RECENT)
+        try:
+            kind, name, nonce = HELLO.unpack(await reader.readexactly(HELLO.size))
+            if kind != HELLO_TYPE:
+                return
+            cabinet = name.rstrip(b"\0").decode("utf-8", "replace")
+            session = (cabinet, nonce)
+            last = self.__last[session] = self.__last.get(session, self.__closed.pop(session, -1))
+            while True:
+                kind, count = SUBMIT.unpack(await reader.readexactly(SUBMIT.size))
+                if kind != SUBMIT_TYPE or count > MAX_BATCH:
+                    return
+                entries = await reader.readexactly(count * ENTRY.size)
+                last = max(last, self.__last.get(session, -1)) #another connection of the session may have added some.
+                replies = []
+                best = None # highest score added from this SUBMIT.
+                for submission, score in ENTRY.iter_unpack(entries):
+                    if submission > last:
+                        rank = self.leaderboard.add(score, cabinet)
+                        last = submission
+                        self.submissions += 1
+                        best = score if best is None else max(best, score)
+                    else:
+                        rank = self.leaderboard.rank(score)
+                    replies.append(RANK.pack(RANK_TYPE, submission, rank, self.leaderboard.total))
+                    recent.append([submission, score, rank])
+                self.__last[session] = last
+                writer.write(b"".join(replies))
+                if best is not None:
+                    if self.__moved is None:
+                        asyncio.get_running_loop().call_later(PUSH_INTERVAL, self.__push)
+                    self.__moved = best if self.__moved is None else max(self.__moved, best)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients -= 1
+            del self.__recent[writer]
+            if session in self.__last:
+                self.__closed[session] = self.__last.pop(session)
+                while len(self.__closed) > CLOSED_SESSIONS:
+                    self.__closed.popitem(last=False)
+            writer.close()
+
+    def __push(self):
+        """ Sends every connection the new ranks of its recent submissions that the scores added since the last round moved down.
+
+        Connections whose replies are piling up unread are skipped, so a client that
+        stops reading cannot make the server buffer without bound.
+        """
+        moved, self.__moved = self.__moved, None
+        for writer, recent in self.__recent.items():
+            transport = writer.transport
+            if transport.is_closing() or transport.get_write_buffer_size() >= transport.get_write_buffer_limits()[1]:
+                continue
+            updates = []
+            for entry in recent:
+                if entry[1] < moved:
+                    rank = self.leaderboard.rank(entry[1])
+                    if rank != entry[2]:
+                        entry[2] = rank
+                        updates.append(RANK.pack(RANK_TYPE, entry[0], rank, self.leaderboard.total))
+            if updates:
+                writer.write(b"".join(updates))
+
+    async def start(self, host="0.0.0.0", port=PORT):
+        """ Starts accepting connections.
+
+        Args:
+            host (String): the address to listen on.
+            port (int): the port to listen on. 0 picks a free one.
+
+        Returns:
+            asyncio.base_events.Server: the listening server.
+        """
+        return await asyncio.start_server(self.handle, host, port, backlog=1024)
+
+class Client:
+    MAX_BACKOFF = 5.0 # longest wait in seconds between two connection attempts.
+
+    def __init__(self, address, cabinet, capacity=64, batch=16):
+        """ Submits scores to a leaderboard server without ever blocking the caller.
+
+        An asyncio event loop on a daemon thread keeps one connection to the server,
+        reconnecting with exponential backoff when it drops. Submissions are queued in
+        memory and sent in batches of up to batch. While the connection is down or the
+        server falls behind, at most capacity submissions are kept and the oldest are
+        dropped, counted in dropped. Submissions that got no rank before the connection
+        dropped are sent again, and the server does not count them twice.
+
+        Args:
+            address (tuple): the (host, port) of the server.
+            cabinet (String): the name of this cabinet, at most 16 bytes are sent.
+            capacity (int): the most submissions waiting to be sent or ranked.
+            batch (int): the most submissions sent in one message.
+        """
+        self.address = tuple(address)
+        self.cabinet = cabinet
+        self.capacity = capacity
+        self.batch = min(batch, MAX_BATCH)
+        self.dropped = 0
+        self.connected = False
+        self.__nonce = random.getrandbits(64)
+        self.__next_id = 0
+        self.__pending = collections.deque() # (id, score) not sent yet, oldest first.
+        self.__unacked = {} # id to score, sent without a rank back yet.
+        self.__ranks = {} # id to (rank, scores ranked).
+        self.__lock = threading.Lock()
+        self.__closing = False
+        self.__loop = asyncio.new_event_loop()
+        self.__wake = asyncio.Event() # set by submit and close.
+        self.__stop = asyncio.Event() # set by close only, so submissions do not cut the backoff short.
+        self.__thread = threading.Thread(target=self.__loop.run_until_complete, args=(self.__main(),), name="leaderboard", daemon=True)
+        self.__thread.start()
+
+    def submit(self, score):
+        """ Queues a finished run's score.
+
+        Args:
+            score (int): the score.
+
+        Returns:
+            int: the submission id to look the rank up with.
+        """
+        with self.__lock:
+            submission = self.__next_id
+            self.__next_id += 1
+            self.__pending.append((submission, score))
+            while len(self.__pending) + len(self.__unacked) > self.capacity and self.__pending:
+                self.__pending.popleft()
+                self.dropped += 1
+        self.__loop.call_soon_threadsafe(self.__wake.set)
+        return submission
+
+    def rank(self, submission):
+        """ Returns the latest rank the server gave a submission.
+
+        The server sends a recent submission's rank again when other cabinets move it
+        down, so polling this keeps a displayed rank current.
+
+        Args:
+            submission (int): the id submit returned.
+
+        Returns:
+            tuple: the (rank, scores ranked) when the server ranked it, or None until then.
+        """
+        with self.__lock:
+            return self.__ranks.get(submission)
+
+    def close(self, timeout=1.0):
+        """ Sends what is queued, waiting at most timeout seconds, and stops the thread.
+
+        Args:
+            timeout (float): the longest time to wait in seconds.
+        """
+        self.__closing = True
+        self.__loop.call_soon_threadsafe(self.__wake.set)
+        self.__loop.call_soon_threadsafe(self.__stop.set)
+        self.__thread.join(timeout)
+
+    async def __main(self):
+        """ Connects, sends and reconnects until close is called.
+        """
+        delay = 0.5
+        while not self.__closing:
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(*self.address), self.MAX_BACKOFF)
+            except (OSError, asyncio.TimeoutError):
+                try:
+                    await asyncio.wait_for(self.__stop.wait(), delay) #close cuts the wait short.
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, self.MAX_BACKOFF)
+                continue
+            delay = 0.5
+            self.connected = True
+            with self.__lock:
+                #resend in order what got no rank on the previous connection
+                self.__pending.extendleft(sorted(self.__unacked.items(), reverse=True))
+                self.__unacked.clear()
+            receive = asyncio.ensure_future(self.__receive(reader))
+            try:
+                writer.write(HELLO.pack(HELLO_TYPE, self.cabinet.encode()[:16], self.__nonce))
+                await self.__send(writer, receive)
+            except (OSError, ConnectionError):
+                pass
+            finally:
+                self.connected = False
+                receive.cancel()
+                writer.close()
+
+    async def __send(self, writer, receive):
+        """ Sends queued submissions in batches until the connection drops or the client closes.
+
+        Waiting for the writer to drain is the backpressure: while the server cannot
+        keep up, submissions pile up in the bounded queue instead of in the socket.
+
+        Args:
+            writer (asyncio.StreamWriter): the connection's writer.
+            receive (asyncio.Future): the task reading the connection's ranks.
+        """
+        while not receive.done():
+            while True:
+                with self.__lock:
+                    batch = [self.__pending.popleft() for _ in range(min(self.batch, len(self.__pending)))]
+                    self.__unacked.update(batch)
+                if not batch:
+                    break
+                writer.write(SUBMIT.pack(SUBMIT_TYPE, len(batch)) + b"".join(ENTRY.pack(*entry) for entry in batch))
+                await writer.drain()
+            if self.__closing:
+                while self.__unacked and not receive.done():
+                    await asyncio.sleep(0.01)
+                return
+            self.__wake.clear()
+            wake = asyncio.ensure_future(self.__wake.wait())
+            await asyncio.wait([wake, receive], return_when=asyncio.FIRST_COMPLETED)
+            wake.cancel()
+
+    async def __receive(self, reader):
+        """ Stores the ranks the server sends until the connection drops.
+
+        Args:
+            reader (asyncio.StreamReader): the connection's reader.
+        """
+        try:
+            while True:
+                _, submission, rank, total = RANK.unpack(await reader.readexactly(RANK.size))
+                with self.__lock:
+                    self.__unacked.pop(submission, None)
+                    self.__ranks[submission] = (rank, total)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+async def load_test(address, clients, submissions, interval):
+    """ Connects many cabinets at once, each submitting scores one at a time and waiting for their ranks.
+
+    Args:
+        address (tuple): the (host, port) of the server.
+        clients (int): the number of connections.
+        submissions (int): the scores each connection submits.
+        interval (float): mean seconds a connection waits between two submissions.
+
+    Returns:
+        list: the seconds from sending each submission to receiving its rank.
+    """
+    latencies = []
+
+    async def cabinet(n):
+        reader, writer = await asyncio.open_connection(*address)
+        writer.write(HELLO.pack(HELLO_TYPE, "load{}".format(n).encode(), random.getrandbits(64)))
+        for i in range(submissions):
+            if interval:
+                await asyncio.sleep(random.expovariate(1 / interval))
+            start = time.perf_counter()
+            writer.write(SUBMIT.pack(SUBMIT_TYPE, 1) + ENTRY.pack(i, random.randrange(100)))
+            await writer.drain()
+            while RANK.unpack(await reader.readexactly(RANK.size))[1] != i:
+                pass #a pushed rank of an earlier submission.
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+        await writer.wait_closed()
+
+    await asyncio.gather(*(cabinet(n) for n in range(clients)))
+    return latencies
+
+async def serve(host, port):
+    """ Runs a server until interrupted, printing its state every ten seconds.
+    """
+    server = Server()
+    listener = await server.start(host, port)
+    print("leaderboard listening on {}:{}".format(host, listener.sockets[0].getsockname()[1]))
+    async with listener:
+        while True:
+            await asyncio.sleep(10)
+            print("{} clients, {} scores, top {}".format(server.clients, server.leaderboard.total, server.leaderboard.top()[:3]))
+
+async def load(args):
+    """ Runs a load test, against a server in the same process with --local.
+    """
+    address = (args.host, args.port)
+    if args.local:
+        server = Server()
+        listener = await server.start("127.0.0.1", 0)
+        address = ("127.0.0.1", listener.sockets[0].getsockname()[1])
+    start = time.perf_counter()
+    latencies = sorted(await load_test(address, args.clients, args.submissions, args.interval))
+    elapsed = time.perf_counter() - start
+    print("{} clients, {} submissions in {:.2f}s, {:.0f} submissions/s".format(args.clients, len(latencies), elapsed, len(latencies) / elapsed))
+    print("rank latency p50 {:.2f} ms, p99 {:.2f} ms, max {:.2f} ms".format(*(latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 for q in (0.5, 0.99, 1))))
+    if args.local:
+        print("top {}".format(server.leaderboard.top()[:3]))
+        listener.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run or load test the shared leaderboard.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run a server")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=PORT)
+    load_parser = commands.add_parser("load", help="connect many clients to a server")
+    load_parser.add_argument("--host", default="127.0.0.1")
+    load_parser.add_argument("--port", type=int, default=PORT)
+    load_parser.add_argument("--local", action="store_true", help="start a server in this process")
+    load_parser.add_argument("--clients", type=int, default=500)
+    load_parser.add_argument("--submissions", type=int, default=20, help="scores per client")
+    load_parser.add_argument("--interval", type=float, default=0.05, help="mean seconds between a client's submissions")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port) if args.command == "serve" else load(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
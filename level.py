@@ -0,0 +1,113 @@
+""" Seedable stream of obstacle spawns, generated ahead of the camera.
+
+A level is an endless list of spawns, each the distance from the previous obstacle
+and the kind of obstacle to place. The spawns are generated in chunks of CHUNK by a
+generator, and every chunk draws from its own random generator seeded with the level
+seed and the chunk number. Skipping ahead to any obstacle therefore only generates the
+chunk it falls in, and the game pulls one spawn at a time in constant time.
+
+Gaps are drawn in pixels at the starting speed and scaled by the speed the obstacles
+will move at when the player reaches them, so the time between two obstacles, and with
+it the room to land and jump again, stays the same as the game speeds up.
+"""
+import random
+
+CHUNK = 64 # spawns generated at once.
+
+def speed(score):
+    """ Returns the change in x-position per tick of the obstacles at a score, see game.move.
+
+    Args:
+        score (int): the score.
+
+    Returns:
+        float: the change in x-position, negative as obstacles move left.
+    """
+    return (-(score + 30) // 10) - score / 10
+
+def chunk(seed, number, gaps, kinds):
+    """ Generates one chunk of spawns.
+
+    Args:
+        seed (int): the level seed.
+        number (int): the chunk number, the chunk holds the spawns from number * CHUNK on.
+        gaps (tuple): the (start, end) distance between two obstacles at the starting speed.
+        kinds (int): the number of obstacle kinds.
+
+    Returns:
+        list: (gap, kind) pairs. The gap of a spawn is its distance from the previous one.
+    """
+    uniform = random.Random("{}:{}".format(seed, number)).random
+    start = speed(0)
+    low, span = gaps[0], gaps[1] - gaps[0] + 1
+    spawns = []
+    for n in range(number * CHUNK, (number + 1) * CHUNK):
+        #obstacle n arrives at the player once n obstacles have been passed
+        gap = round((low + int(uniform() * span)) * speed(n) / start)
+        spawns.append((gap, int(uniform() * kinds)))
+    return spawns
+
+def chunks(seed, number, gaps, kinds):
+    """ Generates the chunks of a level one after another.
+
+    Args:
+        seed (int): the level seed.
+        number (int): the first chunk.
+        gaps (tuple): the (start, end) distance between two obstacles at the starting speed.
+        kinds (int): the number of obstacle kinds.
+
+    Yields:
+        list: the spawns of each chunk, see chunk.
+    """
+    while True:
+        yield chunk(seed, number, gaps, kinds)
+        number += 1
+
+class Level:
+    def __init__(self, seed, gaps, kinds, start=0):
+        """ The spawns of a level, pulled one at a time.
+
+        Args:
+            seed (int): the level seed, the same seed always gives the same spawns.
+            gaps (tuple): the (start, end) distance between two obstacles at the starting speed.
+            kinds (int): the number of obstacle kinds.
+            start (int): the first spawn.
+        """
+        self.seed = seed
+        self.gaps = tuple(gaps)
+        self.kinds = kinds
+        self.index = 0 # the number of the next spawn.
+        self.skip(start)
+
+    def skip(self, count):
+        """ Moves ahead by a number of spawns, only generating the chunk it lands in.
+
+        Args:
+            count (int): the number of spawns to skip.
+        """
+        self.index += count
+        number, self.__offset = divmod(self.index, CHUNK)
+        self.__chunks = chunks(self.seed, number, self.gaps, self.kinds)
+        self.__spawns = next(self.__chunks)
+
+    def peek(self):
+        """ Returns the next spawn without taking it.
+
+        Returns:
+            tuple: the (gap, kind) of the next spawn.
+        """
+        return self.__spawns[self.__offset]
+
+    def pop(self):
+        """ Takes the next spawn.
+
+        Returns:
+            tuple: the (gap, kind) of the spawn.
+        """
+        spawn = self.__spawns[self.__offset]
+        self.index += 1
+        self.__offset += 1
+        if self.__offset == CHUNK:
+            self.__spawns = next(self.__chunks)
+            self.__offset = 0
+        return spawn
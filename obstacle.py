@@ -1,8 +1,11 @@
-import pygame
+import collections
 from block import *
 import game
+import collision
 
 class Obstacle(Block):
+    __slots__ = ("previous", "collided", "speed", "seen")
+
     def __init__(self, x, y, width, height, speed):
         """ Obstacle class, inherits from Block class.
 
@@ -14,20 +17,42 @@ class Obstacle(Block):
             speed (int): speed of obstacle
         """
         super().__init__(x, y, width, height)
-        self.__speed = -speed
-        self.__seen = False
-        self.sprite = pygame.transform.scale_by(game.load_block(240, 0, 16, 48, self.sprite_sheet), 0.5)
-        self.mask = pygame.mask.from_surface(self.sprite)
-        self.rect = self.sprite.get_rect(topleft=(self.rect.x, self.rect.y))
+        self.speed = -speed # change in x-position per tick.
+        self.seen = False # whether the obstacle has passed the player.
+        self.frame = game.obstacle_frame(0)
+        self.rect.size = self.frame.rect.size
+        self.rect.bottom = y + height
+        self.previous = self.rect.topleft # position before the last move.
         self.collided = False
     
+    def reset(self, x, speed, frame=None):
+        """ Puts the obstacle back at a new position so it can be reused.
+
+        Args:
+            x (int): the new x-position of the obstacle.
+            speed (int): speed of obstacle
+            frame (Frame): the kind of obstacle to become, resized to it with its bottom in place. Keeps the current one when omitted.
+        """
+        if frame is not None and frame is not self.frame:
+            bottom = self.rect.bottom
+            self.frame = frame
+            self.rect.size = frame.rect.size
+            self.rect.bottom = bottom
+        self.rect.x = x
+        self.previous = self.rect.topleft
+        self.speed = -speed
+        self.seen = False
+        self.collided = False
+
     def move(self):
         """ Moves the obstacle
         """
-        self.rect.x += self.__speed
+        self.previous = self.rect.topleft
+        self.rect.x += self.speed
 
     def collision(self, player):
-        """ Checks collision of obstacle with player
+        """ Checks collision of obstacle with player at any point during the last tick,
+        so fast obstacles cannot pass through the player between two ticks.
 
         Args:
             player (Player): the player
@@ -35,14 +60,14 @@ class Obstacle(Block):
         Returns:
             bool: Returns True if collision has occured
         """
-        if pygame.sprite.collide_mask(self, player) and not self.collided:
+        if not self.collided and collision.swept_hit(player, self):
             self.collided = True
             return self.collided
     
     def stop(self):
         """ Defines player movement stopping
         """
-        self.__speed = 0
+        self.speed = 0
     
     def setSpeed(self, speed):
         """ Sets player speed
@@ -50,7 +75,7 @@ class Obstacle(Block):
         Args:
             speed (int): player speed
         """
-        self.__speed = speed
+        self.speed = speed
             
     def setSeen(self, seen):
         """ Defines if the obstacle has passed the position of the player
@@ -58,7 +83,7 @@ class Obstacle(Block):
         Args:
             seen (bool): True if obstacle has passed position of the player, otherwise False
         """
-        self.__seen = seen
+        self.seen = seen
     
     def getSeen(self):
         """ Returns if obstacle has passed player position
@@ -66,4 +91,115 @@ class Obstacle(Block):
         Returns:
             bool: Returns True if obstacle has passed position of player
         """
-        return self.__seen
\ No newline at end of file
+        return self.seen
+
+class ObstaclePool:
+    def __init__(self, capacity, y, width, height, speed):
+        """ A fixed number of preallocated obstacles that are recycled instead of rebuilt.
+
+        Active obstacles are kept in a deque ordered by x. As they all move at the same
+        speed, the one that scrolls off-screen first is always at the left end.
+
+        Args:
+            capacity (int): the most obstacles that can be active at once.
+            y (int): y-position of the obstacles.
+            width (int): width of the obstacles.
+            height (int): height of the obstacles.
+            speed (int): speed new obstacles start with.
+        """
+        self.capacity = capacity
+        self.width = width
+        self.speed = speed
+        self.dropped = 0
+        self.level = None # the level.Level placing new obstacles, see game.load_obstacles.
+        self.cursor = None # x-position of the latest spawn, kept scrolling after it despawns.
+        self.__active = collections.deque()
+        self.__free = [Obstacle(0, y, width, height, speed) for _ in range(capacity)]
+
+    def spawn(self, x, frame=None):
+        """ Activates a free obstacle at x.
+
+        Args:
+            x (int): x-position of the new obstacle.
+            frame (Frame): the kind of obstacle, see Obstacle.reset.
+
+        Returns:
+            Obstacle: the obstacle, or None if the pool is full.
+        """
+        if not self.__free:
+            self.dropped += 1
+            return None
+        o = self.__free.pop()
+        o.reset(x, self.speed, frame)
+        self.cursor = o.rect.x
+        if not self.__active or x >= self.__active[-1].rect.x:
+            self.__active.append(o)
+        else:
+            i = 0
+            while self.__active[i].rect.x <= x:
+                i += 1
+            self.__active.insert(i, o)
+        return o
+
+    def despawn(self, limit):
+        """ Returns every obstacle that has scrolled left of limit to the pool.
+
+        Args:
+            limit (int): obstacles with an x-position below this are returned.
+
+        Returns:
+            int: the number of obstacles returned to the pool.
+        """
+        count = 0
+        while self.__active and self.__active[0].rect.x < limit:
+            self.__free.append(self.__active.popleft())
+            count += 1
+        return count
+
+    def move(self, speed):
+        """ Moves every active obstacle, and the cursor, by the same speed.
+
+        Args:
+            speed (float): the change in x-position of this tick.
+        """
+        for o in self.__active:
+            rect = o.rect
+            o.speed = speed
+            o.previous = rect.topleft
+            rect.x += speed
+        if self.cursor is not None:
+            #rounded half away from zero like pygame.Rect, so it stays on the latest spawn while that is active
+            x = self.cursor + speed
+            self.cursor = int(x + 0.5) if x >= 0 else -int(0.5 - x)
+
+    def count_passed(self, x):
+        """ Marks the obstacles whose right edge, at the pool's width, has passed x as seen.
+
+        Args:
+            x (int): the x-position to pass, the player's.
+
+        Returns:
+            int: the number of obstacles that passed x for the first time.
+        """
+        limit = x - self.width
+        passed = 0
+        for o in self.__active:
+            if o.rect.x >= limit:
+                break
+            if not o.seen:
+                o.seen = True
+                passed += 1
+        return passed
+
+    def clear(self):
+        """ Returns every active obstacle to the pool.
+        """
+        self.__free.extend(self.__active)
+        self.__active.clear()
+        self.cursor = None
+
+    def __iter__(self):
+        return iter(self.__active)
+
+    def __len__(self):
+        return len(self.__active)
@@ -0,0 +1,114 @@
+""" Frame pacing for the game loop.
+
+Each frame has a deadline one refresh period after the previous one. The scheduler
+sleeps until shortly before it and spins for the rest, as time.sleep may wake up a
+millisecond or more late, the same trade-off pygame's Clock.tick_busy_loop makes but
+without spinning for the whole frame. The time since the previous frame feeds a fixed
+timestep accumulator, and when the loop falls behind, frames are skipped so that the
+simulation can catch up without drawing in between.
+
+Timers count simulation ticks rather than wall time, so a timed transition such as
+the game-over buffer lasts the same number of ticks however frames are paced.
+"""
+import time
+
+class FrameScheduler:
+    def __init__(self, refresh_rate, tick, max_frame_time=0.25, max_skipped=4, spin=0.002):
+        """ Paces frames and hands out the fixed simulation ticks they call for.
+
+        Args:
+            refresh_rate (int): frames per second to aim for, e.g. 60, 120 or 144. 0 does not wait.
+            tick (float): the length of a simulation tick in seconds.
+            max_frame_time (float): the longest frame the simulation will catch up on.
+            max_skipped (int): the most frames skipped in a row before one is drawn anyway.
+            spin (float): seconds before a deadline to stop sleeping and spin. 0 only sleeps.
+        """
+        self.period = 1 / refresh_rate if refresh_rate else 0
+        self.tick = tick
+        self.max_frame_time = max_frame_time
+        self.max_skipped = max_skipped
+        self.spin = spin
+        self.ticks = 0 # simulation ticks handed out.
+        self.skipped = 0 # frames skipped since the last one drawn.
+        self.frames_skipped = 0
+        self.__timers = {} # timer name to the tick it runs out on.
+        self.reset()
+
+    def reset(self):
+        """ Starts pacing afresh from now, dropping any time owed to the simulation.
+        """
+        self.accumulator = 0.0
+        self.__last = self.__deadline = time.perf_counter()
+
+    def wait(self):
+        """ Waits for the next frame's deadline and adds the time since the previous frame to the accumulator.
+
+        Returns:
+            float: the seconds since the previous call.
+        """
+        self.__deadline += self.period
+        now = time.perf_counter()
+        if now < self.__deadline:
+            if self.__deadline - now > self.spin:
+                time.sleep(self.__deadline - now - self.spin)
+            while now < self.__deadline:
+                now = time.perf_counter()
+        elif now - self.__deadline > self.period:
+            #more than a frame late: pace from now instead of rushing the next frames out
+            self.__deadline = now
+        elapsed = now - self.__last
+        self.__last = now
+        self.accumulator = min(self.accumulator + elapsed, self.max_frame_time)
+        return elapsed
+
+    def step(self):
+        """ Takes a tick from the accumulator if one is due.
+
+        Returns:
+            bool: True if a simulation tick should run.
+        """
+        if self.accumulator < self.tick:
+            return False
+        self.accumulator -= self.tick
+        self.ticks += 1
+        return True
+
+    def should_draw(self):
+        """ Decides whether to draw the current frame. Call once the frame's ticks have run.
+
+        Returns:
+            bool: False if the next frame's deadline has already passed, so that the loop
+            goes straight on to simulating it, unless max_skipped frames were skipped in a row.
+        """
+        if self.period and self.skipped < self.max_skipped and time.perf_counter() > self.__deadline + self.period:
+            self.skipped += 1
+            self.frames_skipped += 1
+            return False
+        self.skipped = 0
+        return True
+
+    def after(self, delay, name):
+        """ Starts a timer, restarting it if it is already running.
+
+        Args:
+            delay (float): seconds of simulation time until the timer runs out.
+            name (String): the timer.
+        """
+        self.__timers[name] = self.ticks + max(1, round(delay / self.tick))
+
+    def running(self, name):
+        """ Returns whether a timer is running.
+
+        Args:
+            name (String): the timer.
+
+        Returns:
+            bool: True until as many ticks as its delay have been handed out.
+        """
+        end = self.__timers.get(name)
+        if end is None:
+            return False
+        if self.ticks >= end:
+            del self.__timers[name]
+            return False
+        return True
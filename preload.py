@@ -0,0 +1,79 @@
+""" Loads the game's files on a worker thread while the main thread keeps drawing.
+
+Each job reads and decodes one file on the worker. Finished jobs are picked up by
+poll on the main thread, which converts images to the display format (SDL only
+allows that on the thread that owns the display) and adds them to the asset store,
+where assets.image, assets.sound and assets.source find them without touching disk.
+"""
+import collections
+import concurrent.futures
+import pygame
+import assets
+
+def decode(kind, path):
+    """ Reads and decodes a file. Runs on the worker thread, so it must not use the display.
+
+    Args:
+        kind (String): "image" or "sheet" for images, "sound" for sound effects and "file" for raw contents.
+        path (String): the file.
+
+    Returns:
+        object: the decoded pygame.Surface or pygame.mixer.Sound, or the file contents.
+    """
+    if kind in ("image", "sheet"):
+        return pygame.image.load(path)
+    if kind == "sound":
+        return pygame.mixer.Sound(path)
+    with open(path, "rb") as f:
+        return f.read()
+
+class Preloader:
+    def __init__(self, jobs):
+        """ Starts loading files in the background.
+
+        Args:
+            jobs (list): (kind, path) pairs, see decode. Sheets are converted with per-pixel
+            alpha, other images only if they have it. They are stored in the given order.
+        """
+        self.total = len(jobs)
+        self.loaded = 0
+        self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="preload")
+        self.__pending = collections.deque((kind, path, self.__executor.submit(decode, kind, path)) for kind, path in jobs)
+
+    @property
+    def done(self):
+        """ Whether every file has been loaded and stored.
+        """
+        return not self.__pending
+
+    def poll(self):
+        """ Stores the files the worker has finished, in order. Call from the main thread.
+
+        Returns:
+            float: the fraction of files stored so far.
+
+        Raises:
+            Exception: whatever decoding a file raised on the worker.
+        """
+        while self.__pending and self.__pending[0][2].done():
+            kind, path, future = self.__pending.popleft()
+            value = future.result()
+            if kind == "sheet":
+                assets.images[path] = assets.convert(value)
+            elif kind == "image":
+                assets.images[path] = assets.convert(value, alpha=None)
+            elif kind == "sound":
+                assets.sounds[path] = value
+            else:
+                assets.files[path] = value
+            self.loaded += 1
+        if self.done:
+            self.__executor.shutdown()
+        return self.loaded / self.total if self.total else 1.0
+
+    def wait(self):
+        """ Blocks until every file has been loaded and stored.
+        """
+        for _, _, future in list(self.__pending):
+            future.result()
+        self.poll()
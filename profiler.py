@@ -0,0 +1,219 @@
+""" Per-stage frame timings for the game loop.
+
+The loop calls mark after each stage, which adds the time since the previous mark
+to that stage's slot of the current frame, and end_frame once the frame has been
+presented. Timings are kept for the last frames in a preallocated ring buffer, so
+recording a frame allocates nothing beyond the floats perf_counter returns.
+"""
+import array
+import csv
+import json
+import time
+import pygame
+import text
+
+STAGES = ("clock", "events", "return_game_state", "update_score", "load_obstacles", "move", "simulation", "background", "draw", "profiler", "display")
+
+class Profiler:
+    OVERLAY_REFRESH = 30 # frames between two renders of the overlay.
+    OVERLAY_FONT = "font1.ttf"
+    OVERLAY_FONT_SIZE = 12
+
+    def __init__(self, capacity=600, stages=STAGES):
+        """ Collects the time spent in each stage of the last frames.
+
+        Args:
+            capacity (int): the number of frames kept.
+            stages (tuple): the stage names, in the order they run within a frame.
+        """
+        self.stages = stages
+        self.capacity = capacity
+        self.frames = 0
+        self.__index = {stage: i for i, stage in enumerate(stages)}
+        #one extra slot for the frame in progress
+        self.__times = array.array("d", bytes(8 * (capacity + 1) * len(stages)))
+        self.__starts = array.array("d", bytes(8 * (capacity + 1)))
+        self.__zeros = array.array("d", bytes(8 * len(stages)))
+        self.__row = 0
+        self.__last = time.perf_counter()
+        self.__starts[0] = self.__last
+        self.__latencies = array.array("d", bytes(8 * capacity))
+        self.latency_samples = 0
+        self.__overlay = None
+        self.__overlay_frame = -1
+
+    def mark(self, stage):
+        """ Ends a stage, adding the time since the previous mark to it. A stage marked several times in a frame adds up.
+
+        Args:
+            stage (String): the stage that just finished.
+        """
+        now = time.perf_counter()
+        self.__times[self.__row + self.__index[stage]] += now - self.__last
+        self.__last = now
+
+    def end_frame(self):
+        """ Ends the current frame and starts recording the next one in the oldest slot.
+        """
+        self.frames += 1
+        slot = self.frames % (self.capacity + 1)
+        self.__row = slot * len(self.stages)
+        self.__times[self.__row:self.__row + len(self.stages)] = self.__zeros
+        self.__last = time.perf_counter()
+        self.__starts[slot] = self.__last
+
+    def record_latency(self, latency):
+        """ Records the input-to-present latency of one press, kept for the last capacity presses.
+
+        Args:
+            latency (float): the latency in milliseconds, see controls.Input.presented.
+        """
+        self.__latencies[self.latency_samples % self.capacity] = latency
+        self.latency_samples += 1
+
+    def latency_percentiles(self, quantiles=(0.5, 0.99)):
+        """ Returns percentiles of the recorded input-to-present latencies.
+
+        Args:
+            quantiles (tuple): the quantiles to return, between 0 and 1.
+
+        Returns:
+            list: the latency in milliseconds at each quantile, zeros if no press has been recorded.
+        """
+        samples = sorted(self.__latencies[:min(self.latency_samples, self.capacity)])
+        if not samples:
+            return [0.0 for _ in quantiles]
+        return [samples[min(int(len(samples) * q), len(samples) - 1)] for q in quantiles]
+
+    def __slots(self):
+        """ Returns the ring buffer slots of the completed frames that are kept, oldest first.
+        """
+        count = min(self.frames, self.capacity)
+        return [(self.frames - count + i) % (self.capacity + 1) for i in range(count)]
+
+    def samples(self, stage=None):
+        """ Returns the recorded times of a stage, oldest first.
+
+        Args:
+            stage (String): the stage. Defaults to the whole frame.
+
+        Returns:
+            list: the time in milliseconds of each completed frame that is kept.
+        """
+        n = len(self.stages)
+        if stage is None:
+            return [sum(self.__times[s * n:(s + 1) * n]) * 1000 for s in self.__slots()]
+        i = self.__index[stage]
+        return [self.__times[s * n + i] * 1000 for s in self.__slots()]
+
+    def percentiles(self, stage=None, quantiles=(0.5, 0.99)):
+        """ Returns percentiles of a stage's recorded times.
+
+        Args:
+            stage (String): the stage. Defaults to the whole frame.
+            quantiles (tuple): the quantiles to return, between 0 and 1.
+
+        Returns:
+            list: the time in milliseconds at each quantile, zeros if no frame has completed.
+        """
+        samples = sorted(self.samples(stage))
+        if not samples:
+            return [0.0 for _ in quantiles]
+        return [samples[min(int(len(samples) * q), len(samples) - 1)] for q in quantiles]
+
+    def fps(self):
+        """ Returns the mean frame rate over the kept frames.
+
+        Returns:
+            float: frames per second.
+        """
+        frames = self.samples()
+        return len(frames) * 1000 / sum(frames) if frames and sum(frames) else 0.0
+
+    def draw(self, surface, position=(4, 4)):
+        """ Draws the FPS and the p50/p99 of every stage. The text is rendered again every OVERLAY_REFRESH frames.
+
+        Args:
+            surface (pygame.Surface): the surface to draw on.
+            position (tuple): the top left of the overlay.
+
+        Returns:
+            pygame.Rect: the area drawn on.
+        """
+        if self.__overlay is None or (self.frames != self.__overlay_frame and self.frames % self.OVERLAY_REFRESH == 0):
+            self.__overlay = self.__render()
+            self.__overlay_frame = self.frames
+        return surface.blit(self.__overlay, position)
+
+    def __render(self):
+        """ Renders the overlay text onto a translucent panel.
+        """
+        font = text.font(self.OVERLAY_FONT, self.OVERLAY_FONT_SIZE)
+        p50, p99 = self.percentiles()
+        lines = ["FPS {:.1f}  frame p50 {:.2f} p99 {:.2f} ms".format(self.fps(), p50, p99)]
+        for stage in self.stages:
+            p50, p99 = self.percentiles(stage)
+            lines.append("{}  p50 {:.2f} p99 {:.2f}".format(stage, p50, p99))
+        if self.latency_samples:
+            p50, p99 = self.latency_percentiles()
+            lines.append("input to present  p50 {:.2f} p99 {:.2f}".format(p50, p99))
+        rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(r.get_width() for r in rendered) + 8
+        height = sum(r.get_height() for r in rendered) + 8
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 160))
+        y = 4
+        for r in rendered:
+            panel.blit(r, (4, y))
+            y += r.get_height()
+        return panel
+
+    def dump(self, path):
+        """ Writes the kept frames to a file, as a Chrome trace if the path ends in .json and as CSV otherwise.
+
+        Args:
+            path (String): the file to write.
+        """
+        if path.endswith(".json"):
+            self.dump_trace(path)
+        else:
+            self.dump_csv(path)
+
+    def dump_csv(self, path):
+        """ Writes one row per kept frame with its start time and the time of every stage, in milliseconds.
+
+        Args:
+            path (String): the file to write.
+        """
+        slots = self.__slots()
+        n = len(self.stages)
+        origin = self.__starts[slots[0]] if slots else 0
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "start_ms"] + list(self.stages) + ["total_ms"])
+            for frame, s in enumerate(slots, self.frames - len(slots)):
+                times = [t * 1000 for t in self.__times[s * n:(s + 1) * n]]
+                writer.writerow([frame, "{:.3f}".format((self.__starts[s] - origin) * 1000)] + ["{:.3f}".format(t) for t in times] + ["{:.3f}".format(sum(times))])
+
+    def dump_trace(self, path):
+        """ Writes the kept frames in the Chrome trace event format, for chrome://tracing or Perfetto.
+
+        Only the total per stage is recorded, so within a frame the stages are laid out
+        back to back in the order of stages, even those that ran once per simulation tick.
+
+        Args:
+            path (String): the file to write.
+        """
+        slots = self.__slots()
+        n = len(self.stages)
+        origin = self.__starts[slots[0]] if slots else 0
+        events = []
+        for frame, s in enumerate(slots, self.frames - len(slots)):
+            ts = (self.__starts[s] - origin) * 1e6
+            times = self.__times[s * n:(s + 1) * n]
+            events.append({"name": "frame", "ph": "X", "ts": ts, "dur": sum(times) * 1e6, "pid": 0, "tid": 0, "args": {"frame": frame}})
+            for stage, t in zip(self.stages, times):
+                events.append({"name": stage, "ph": "X", "ts": ts, "dur": t * 1e6, "pid": 0, "tid": 0})
+                ts += t * 1e6
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,138 @@
+import pygame
+
+def static_layer(size, background, tiles, bg_width, ground):
+    """ Composites the parts of the scene that never move into one surface.
+
+    Args:
+        size (tuple): the (width, height) of the screen.
+        background (pygame.Surface): the background image.
+        tiles (int): the number of background tiles to blit.
+        bg_width (int): the width of the background image.
+        ground (list): list of type Block representing the ground.
+
+    Returns:
+        pygame.Surface: the background tiles with the ground drawn on top.
+    """
+    layer = pygame.Surface(size).convert()
+    for i in range(tiles):
+        layer.blit(background, (i * bg_width, 0))
+    for g in ground:
+        g.draw(layer)
+    return layer
+
+class DirtyRenderer:
+    def __init__(self, screen, static, output=pygame.display):
+        """ Renders a frame by only touching the areas that changed.
+
+        Each frame the areas drawn on during the previous frame are restored from the
+        static layer, and only those areas plus the ones drawn on this frame are pushed
+        to the display.
+
+        Args:
+            screen (pygame.Surface): the surface the game draws on.
+            static (pygame.Surface): the static layer, see static_layer.
+            output (object): what the areas are pushed to with update(rects), the display or a ScaledDisplay.
+        """
+        self.screen = screen
+        self.static = static
+        self.output = output
+        self.__dirty = []
+        self.screen.blit(self.static, (0, 0))
+        self.output.update()
+
+    def begin(self):
+        """ Restores the areas drawn on during the previous frame from the static layer.
+        """
+        for rect in self.__dirty:
+            self.screen.blit(self.static, rect, rect)
+
+    def present(self, rects):
+        """ Pushes the restored and newly drawn areas to the display.
+
+        Args:
+            rects (list): the rects drawn on this frame.
+
+        Returns:
+            list: the rects that were pushed to the display.
+        """
+        updated = self.__dirty + rects
+        self.output.update(updated)
+        self.__dirty = rects
+        return updated
+
+class ScaledDisplay:
+    def __init__(self, logical_size, integer=False):
+        """ A framebuffer with a fixed logical resolution, scaled to fit the window when presented.
+
+        The game draws on surface, so its layout and drawing cost do not depend on the
+        window size. The scaled image keeps the aspect ratio and is centered, with black
+        bars filling the rest. When the window is an integer multiple of the logical size
+        the frame is scaled with nearest-neighbour sampling, and update only scales the
+        areas it is given. Otherwise the whole frame is smoothly scaled every update.
+
+        Args:
+            logical_size (tuple): the (width, height) the game is drawn at.
+            integer (bool): only scale by whole factors, leaving wider bars, so the fast path is always taken.
+        """
+        self.surface = pygame.Surface(logical_size).convert()
+        self.integer = integer
+        self.__viewports = {}
+        self.__size = None
+
+    def viewport(self, window_size):
+        """ Returns where the framebuffer is drawn in a window. Computed once per window size.
+
+        Args:
+            window_size (tuple): the (width, height) of the window.
+
+        Returns:
+            tuple: the pygame.Rect covered in the window, and the integer scale factor or None if it is not whole.
+        """
+        if window_size not in self.__viewports:
+            width, height = self.surface.get_size()
+            scale = min(window_size[0] / width, window_size[1] / height)
+            factor = None
+            if self.integer and scale >= 1:
+                scale = factor = int(scale)
+            elif scale == int(scale):
+                factor = int(scale)
+            rect = pygame.Rect(0, 0, int(width * scale), int(height * scale))
+            rect.center = (window_size[0] // 2, window_size[1] // 2)
+            self.__viewports[window_size] = (rect, factor)
+        return self.__viewports[window_size]
+
+    def update(self, rects=None):
+        """ Scales the framebuffer to the window and pushes it to the display.
+
+        Args:
+            rects (list): the areas of the framebuffer that changed. Defaults to all of it.
+        """
+        window = pygame.display.get_surface()
+        size = window.get_size()
+        rect, factor = self.viewport(size)
+        if size != self.__size:
+            #new window size: clear the bars once and redraw everything
+            self.__size = size
+            window.fill((0, 0, 0))
+            rects = None
+
+        if factor is None:
+            pygame.transform.smoothscale(self.surface, rect.size, window.subsurface(rect))
+            if rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(rect)
+        elif rects is None:
+            pygame.transform.scale(self.surface, rect.size, window.subsurface(rect))
+            pygame.display.update()
+        else:
+            bounds = self.surface.get_rect()
+            updated = []
+            for r in rects:
+                r = bounds.clip(r)
+                if not r.width or not r.height:
+                    continue
+                target = pygame.Rect(rect.x + r.x * factor, rect.y + r.y * factor, r.width * factor, r.height * factor)
+                pygame.transform.scale(self.surface.subsurface(r), target.size, window.subsurface(target))
+                updated.append(target)
+            pygame.display.update(updated)
@@ -0,0 +1,153 @@
+""" Compact binary recordings of game sessions, and a headless replayer to verify them.
+
+A recording holds everything the simulation needs to play a session again: the
+header stores the random seed, the screen size and the values of the game constants
+that change how a seed plays out, see game.SIMULATION_CONSTANTS, so that sessions
+played with overridden rules are replayed with the same rules. The body stores the
+per-tick input snapshots run-length encoded, and the trailer stores the tick count
+and final score.
+Run from the repository root to verify a recording:
+
+    python replay.py session.rec
+"""
+import argparse
+import ast
+import mmap
+import struct
+import time
+import game
+import simulation
+
+MAGIC = b"RUNR"
+VERSION = 8 # bumped whenever the rules change how a seed plays out.
+HEADER = struct.Struct("<4sBqHHH") # magic, version, seed, tick rate, screen width, screen height
+CONSTANTS = struct.Struct("<I") # length of the constants that follow, a dict literal in UTF-8
+RUN = struct.Struct("<HH") # input snapshot, number of ticks it was held for
+TRAILER = struct.Struct("<QI") # total ticks, final score
+END = 0xFFFF # input value marking the end of the runs
+MAX_RUN = 0xFFFF
+
+class Recorder:
+    def __init__(self, path, seed, screen_size):
+        """ Streams the inputs of a session to a recording file while it is played.
+
+        The simulation constants are recorded as the game module holds them now, so
+        create the recorder after game.init.
+
+        Args:
+            path (String): the file to write.
+            seed (int): the seed the session's Simulation was created with.
+            screen_size (tuple): the (width, height) of the screen.
+        """
+        self.ticks = 0
+        self.__file = open(path, "wb")
+        self.__file.write(HEADER.pack(MAGIC, VERSION, seed, simulation.TICK_RATE, int(screen_size[0]), int(screen_size[1])))
+        constants = repr({name: getattr(game, name) for name in game.SIMULATION_CONSTANTS}).encode()
+        self.__file.write(CONSTANTS.pack(len(constants)) + constants)
+        self.__inputs = None
+        self.__run = 0
+
+    def record(self, inputs):
+        """ Records the input snapshot of one simulation tick.
+
+        Args:
+            inputs (int): the input snapshot passed to Simulation.step.
+        """
+        self.ticks += 1
+        if inputs == self.__inputs and self.__run < MAX_RUN:
+            self.__run += 1
+            return
+        if self.__run:
+            self.__file.write(RUN.pack(self.__inputs, self.__run))
+        self.__inputs = inputs
+        self.__run = 1
+
+    def close(self, score):
+        """ Writes the trailer and closes the file.
+
+        Args:
+            score (int): the final score of the session.
+        """
+        if self.__run:
+            self.__file.write(RUN.pack(self.__inputs, self.__run))
+        self.__file.write(RUN.pack(END, 0))
+        self.__file.write(TRAILER.pack(self.ticks, score))
+        self.__file.close()
+
+class Recording:
+    def __init__(self, path):
+        """ A recording file, memory-mapped for reading.
+
+        Args:
+            path (String): the file to read.
+        """
+        with open(path, "rb") as f:
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.seed, self.tick_rate, width, height = HEADER.unpack_from(self.__map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a version {} recording: {}".format(VERSION, path))
+        self.screen_size = (width, height)
+        length, = CONSTANTS.unpack_from(self.__map, HEADER.size)
+        start = HEADER.size + CONSTANTS.size + length
+        self.constants = ast.literal_eval(self.__map[HEADER.size + CONSTANTS.size:start].decode()) # game constants the session was played with.
+        end = len(self.__map) - TRAILER.size - RUN.size
+        if end < start or RUN.unpack_from(self.__map, end)[0] != END:
+            raise ValueError("recording has no trailer, the session was not closed: " + path)
+        self.ticks, self.score = TRAILER.unpack_from(self.__map, end + RUN.size)
+        self.__runs = memoryview(self.__map)[start:end]
+
+    def inputs(self):
+        """ Yields the input snapshot of every recorded tick, in order.
+
+        Yields:
+            int: an input snapshot.
+        """
+        for inputs, run in RUN.iter_unpack(self.__runs):
+            for _ in range(run):
+                yield inputs
+
+    def close(self):
+        """ Unmaps the file.
+        """
+        self.__runs.release()
+        self.__map.close()
+
+def verify(path):
+    """ Re-simulates a recording as fast as possible, with the constants it was played with, and checks its final score.
+
+    Args:
+        path (String): the recording file.
+
+    Returns:
+        tuple: whether the replayed score matches, the replayed score, the recorded score and the ticks replayed.
+    """
+    recording = Recording(path)
+    try:
+        if recording.tick_rate != simulation.TICK_RATE:
+            raise ValueError("recorded at {} ticks per second, the simulation runs at {}".format(recording.tick_rate, simulation.TICK_RATE))
+        game.init(game.Config(recording.screen_size, audio=False, **recording.constants))
+        sim = simulation.Simulation(recording.seed)
+        ticks = 0
+        for inputs in recording.inputs():
+            sim.step(inputs)
+            ticks += 1
+        score = sim.scoreboard.getScore()
+        return score == recording.score and ticks == recording.ticks, score, recording.score, ticks
+    finally:
+        recording.close()
+
+def main():
+    import headless #selects SDL's dummy drivers before verify initialises the game.
+    parser = argparse.ArgumentParser(description="Replay a recorded session headless and verify its score.")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ok, score, expected, ticks = verify(args.path)
+    elapsed = time.perf_counter() - start
+    print("{}: replayed score {}, recorded score {}, {} ticks in {:.2f}s ({:.0f} ticks/s)".format(
+        "ok" if ok else "MISMATCH", score, expected, ticks, elapsed, ticks / elapsed))
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,34 @@
+""" The scoreboard of a run, and the log every finished run is kept in.
+
+The log is an append-only file of fixed-size records, one per finished session,
+written in batches by a background thread so that the game loop never waits on the
+disk. Next to it an index file holds the best sessions and a summary of each day,
+along with the number of records it covers, so opening the log reads the index and
+only the records appended since it was last written, not the whole history.
+"""
+import bisect
+import collections
+import datetime
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
 import pygame
+import text
+
+MAGIC = b"RSCO"
+VERSION = 1
+HEADER = struct.Struct("<4sB") # magic, version
+RECORD = struct.Struct("<dIIQ") # end time, score, ticks played, level seed
+INDEX_MAGIC = b"RSCI"
+INDEX_HEADER = struct.Struct("<4sBIII") # magic, version, records indexed, best sessions, days
+TOP_ENTRY = struct.Struct("<II") # score, record number
+DAY_ENTRY = struct.Struct("<iIIII") # date ordinal, first record, last record, records, best score
+TOP = 100 # best sessions kept in the index.
+
+Session = collections.namedtuple("Session", ["time", "score", "ticks", "seed"]) # a finished session: when it ended, its score, the ticks it lasted and the seed of its level.
 
 class Scoreboard:
     def __init__(self, x, y, width, height, font_size):
@@ -11,9 +41,13 @@ class Scoreboard:
             height (int): height of the scoreboard
         """
         self.score = 0
+        self.best = 0 # best score of any session, see ScoreLog.best.
+        self.rank = None # (rank, scores ranked) of the last run on the shared leaderboard, see leaderboard.Client.
         self.rect= pygame.Rect(x, y, width, height)
-        self.font = pygame.font.Font("fonts/font1.ttf", font_size)
-        self.text = self.font.render("Dodged: " + str(self.score), True, (0, 0, 0))
+        self.font = text.font("font1.ttf", font_size)
+        self.label = text.NumberLabel("font1.ttf", font_size, "Dodged: ", (0, 0, 0))
+        self.label.set(self.score)
+        self.text = self.label.surface
     
     def getText(self):
         """ Returns the text of the scoreboard
@@ -25,8 +59,11 @@ class Scoreboard:
     
     def updateText(self):
         """ Updates the text of the scorebard based on the current score.
+
+        Only the digit glyphs are redrawn, and only when the score has changed.
         """
-        self.text = self.font.render("Dodged: " + str(self.score), True, (0, 0, 0))
+        self.label.set(self.score)
+        self.text = self.label.surface
 
     def incrementScore(self):
         """ incremenets current score.
@@ -40,10 +77,251 @@ class Scoreboard:
             _type_: _description_
         """
         return self.score
-    
-        
-  
-    
-    
-       
-    
\ No newline at end of file
+
+class ScoreLog:
+    def __init__(self, path, top=TOP):
+        """ Opens or creates a log of finished sessions and its index.
+
+        Args:
+            path (String): the log file. The index is kept in path + ".idx".
+            top (int): the number of best sessions kept in the index.
+
+        Raises:
+            ValueError: if the file is not a score log of this version.
+        """
+        self.path = path
+        self.index_path = path + ".idx"
+        self.top_size = top
+        self.__lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+            #a crash before the header was written leaves a file too short to hold any records
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION))
+        self.__file = open(path, "r+b")
+        magic, version = HEADER.unpack(self.__file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            self.__file.close()
+            raise ValueError("not a version {} score log: {}".format(VERSION, path))
+        #a record cut short by a crash is left out, and written over by the next append
+        self.__count = (os.fstat(self.__file.fileno()).st_size - HEADER.size) // RECORD.size
+        self.__map = None
+        self.__top = [] # (-score, record number) of the best sessions, best first.
+        self.__days = {} # date ordinal to [first record, last record, records, best score].
+
+        indexed = self.__read_index()
+        if indexed < self.__count:
+            #only the records appended after the index was written are read
+            for i in range(indexed, self.__count):
+                self.__add(i, self.__record(i))
+            self.__write_index(self.__pack_index())
+
+    def __len__(self):
+        return self.__count
+
+    def __read_index(self):
+        """ Loads the index file.
+
+        Returns:
+            int: the number of records it covers, 0 if it is missing, stale or damaged.
+        """
+        try:
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+            magic, version, indexed, tops, days = INDEX_HEADER.unpack_from(data)
+            if magic != INDEX_MAGIC or version != VERSION or indexed > self.__count:
+                return 0
+            offset = INDEX_HEADER.size
+            top = [(-value, i) for value, i in TOP_ENTRY.iter_unpack(data[offset:offset + tops * TOP_ENTRY.size])]
+            offset += tops * TOP_ENTRY.size
+            entries = DAY_ENTRY.iter_unpack(data[offset:offset + days * DAY_ENTRY.size])
+            self.__days = {day: [first, last, count, best] for day, first, last, count, best in entries}
+            self.__top = top[:self.top_size]
+            return indexed
+        except (OSError, struct.error):
+            self.__top, self.__days = [], {}
+            return 0
+
+    def __pack_index(self):
+        """ Returns the contents of the index file for the records added so far.
+        """
+        parts = [INDEX_HEADER.pack(INDEX_MAGIC, VERSION, self.__count, len(self.__top), len(self.__days))]
+        parts += [TOP_ENTRY.pack(-value, i) for value, i in self.__top]
+        parts += [DAY_ENTRY.pack(day, *entry) for day, entry in self.__days.items()]
+        return b"".join(parts)
+
+    def __write_index(self, data):
+        """ Replaces the index file in one step, so a crash leaves either the old or the new one.
+        """
+        with open(self.index_path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(self.index_path + ".tmp", self.index_path)
+
+    def __add(self, i, session):
+        """ Adds a record to the in-memory index.
+
+        Args:
+            i (int): the record number.
+            session (Session): the record.
+        """
+        entry = (-session.score, i)
+        if len(self.__top) < self.top_size or entry < self.__top[-1]:
+            bisect.insort(self.__top, entry)
+            del self.__top[self.top_size:]
+        day = datetime.date.fromtimestamp(session.time).toordinal()
+        summary = self.__days.get(day)
+        if summary is None:
+            self.__days[day] = [i, i, 1, session.score]
+        else:
+            summary[1] = i
+            summary[2] += 1
+            summary[3] = max(summary[3], session.score)
+
+    def __record(self, i):
+        """ Reads a record through the memory map, mapping the file again if it has grown.
+
+        Args:
+            i (int): the record number.
+
+        Returns:
+            Session: the record.
+        """
+        end = HEADER.size + (i + 1) * RECORD.size
+        if self.__map is None or len(self.__map) < end:
+            if self.__map is not None:
+                self.__map.close()
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        return Session._make(RECORD.unpack_from(self.__map, end - RECORD.size))
+
+    def append(self, sessions):
+        """ Writes sessions at the end of the log and updates the index. Only one thread may append.
+
+        Args:
+            sessions (list): the Sessions to write, in the order they finished.
+        """
+        start = self.__count
+        self.__file.seek(HEADER.size + start * RECORD.size)
+        self.__file.write(b"".join(RECORD.pack(*session) for session in sessions))
+        self.__file.truncate()
+        self.__file.flush()
+        with self.__lock:
+            for i, session in enumerate(sessions, start):
+                self.__add(i, session)
+            self.__count += len(sessions)
+            index = self.__pack_index()
+        self.__write_index(index)
+
+    def best(self):
+        """ Returns the best score of any session.
+
+        Returns:
+            int: the score, 0 if the log is empty.
+        """
+        with self.__lock:
+            return -self.__top[0][0] if self.__top else 0
+
+    def top(self, n=10):
+        """ Returns the best sessions, from the index.
+
+        Args:
+            n (int): the number of sessions, at most the top the index keeps.
+
+        Returns:
+            list: Sessions, best first. Sessions with the same score are in the order they finished.
+        """
+        with self.__lock:
+            return [self.__record(i) for _, i in self.__top[:n]]
+
+    def days(self):
+        """ Returns a summary of every day sessions finished on, from the index.
+
+        Returns:
+            list: (datetime.date, sessions, best score) tuples, oldest first.
+        """
+        with self.__lock:
+            return [(datetime.date.fromordinal(day), count, best) for day, (_, _, count, best) in sorted(self.__days.items())]
+
+    def day(self, date):
+        """ Returns the sessions that finished on a day, reading only the records between its first and last.
+
+        Args:
+            date (datetime.date): the day, in local time.
+
+        Returns:
+            list: Sessions, in the order they finished.
+        """
+        day = date.toordinal()
+        with self.__lock:
+            summary = self.__days.get(day)
+            if summary is None:
+                return []
+            sessions = [self.__record(i) for i in range(summary[0], summary[1] + 1)]
+        #records from around a clock change can interleave with another day's
+        return [s for s in sessions if datetime.date.fromtimestamp(s.time).toordinal() == day]
+
+    def close(self):
+        """ Closes the log. Close its ScoreWriter first.
+        """
+        if self.__map is not None:
+            self.__map.close()
+        self.__file.close()
+
+class ScoreWriter:
+    def __init__(self, log, batch=16, interval=1.0):
+        """ Appends sessions to a log on a background thread, so that submitting never waits on the disk.
+
+        Submitted sessions are queued in memory and written in one append as soon as
+        batch of them have queued up, or interval seconds after the first one.
+
+        Args:
+            log (ScoreLog): the log to append to.
+            batch (int): the most sessions written at once.
+            interval (float): the longest time in seconds a session waits to be written.
+        """
+        self.log = log
+        self.batch = batch
+        self.interval = interval
+        self.error = None # the last error writing to the log, sessions in a failed batch are lost.
+        self.__queue = queue.SimpleQueue()
+        self.__thread = threading.Thread(target=self.__run, name="score-writer", daemon=True)
+        self.__thread.start()
+
+    def submit(self, session):
+        """ Queues a finished session to be written.
+
+        Args:
+            session (Session): the session.
+        """
+        self.__queue.put(session)
+
+    def close(self):
+        """ Writes the queued sessions and stops the thread.
+        """
+        self.__queue.put(None)
+        self.__thread.join()
+
+    def __run(self):
+        """ Writes batches of queued sessions until close is called.
+        """
+        closing = False
+        while not closing:
+            session = self.__queue.get()
+            if session is None:
+                break
+            pending = [session]
+            deadline = time.monotonic() + self.interval
+            while len(pending) < self.batch:
+                try:
+                    session = self.__queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if session is None:
+                    closing = True
+                    break
+                pending.append(session)
+            try:
+                self.log.append(pending)
+            except OSError as e:
+                self.error = e
@@ -0,0 +1,90 @@
+import random
+import game
+import character
+import block
+import score
+import controls
+import level
+
+TICK_RATE = 60 # simulation ticks per second.
+TICK = 1 / TICK_RATE # length of one simulation tick in seconds.
+
+class Simulation:
+    def __init__(self, seed=None):
+        """ The game rules advanced one fixed tick at a time.
+
+        Nothing here reads the keyboard, plays audio, draws or waits on a clock, so a
+        simulation can be stepped as fast as possible without a display. Sounds the
+        renderer should play are reported through events after each step. The game is
+        initialised with the default config if game.init has not been called yet.
+
+        Args:
+            seed (int): seed of this simulation's own random generator. Two simulations
+            with the same seed and inputs play out identically.
+        """
+        game.init()
+        self.rng = random.Random(seed)
+        self.player = character.Character(game.PLAYER_START_X, game.PLAYER_START_Y, game.PLAYER_WIDTH, game.PLAYER_HEIGHT)
+        self.ground = [block.Block(b, int(game.SCREEN_HEIGHT) - game.GROUND_BLOCK_HEIGHT, game.GROUND_BLOCK_WIDTH, game.GROUND_BLOCK_HEIGHT) for b in range(0, int(game.SCREEN_WIDTH), game.GROUND_BLOCK_WIDTH)]
+        self.floor = block.Ground(self.ground)
+        self.scoreboard = score.Scoreboard(game.SCREEN_WIDTH - (2 * game.SCOREBOARD_WIDTH), game.SCOREBOARD_Y + 10, game.SCOREBOARD_WIDTH, game.SCOREBOARD_HEIGHT, 20)
+        self.obstacles = game.reset_game(self.player, self.scoreboard, self.rng)
+        self.state = "start"
+        self.ticks = 0
+        self.events = []
+        self.profiler = None #a profiler.Profiler to mark the stages of each step with.
+
+    def step(self, inputs):
+        """ Advances the game by one tick.
+
+        Args:
+            inputs (int): the input snapshot for this tick, a bitfield of the controls module's bits.
+
+        Returns:
+            String: The new state of the game.
+        """
+        self.events = []
+        previous_state = self.state
+        previous_score = self.scoreboard.getScore()
+
+        profiler = self.profiler
+        self.state = game.return_game_state(self.obstacles, self.player, self.state, inputs)
+        if profiler is not None:
+            profiler.mark("return_game_state")
+        if previous_state == "start" and self.state == "playing":
+            self.events.append("start")
+        elif previous_state == "playing" and self.state == "game_over":
+            self.events.append("die")
+
+        if self.state == "playing":
+            game.update_score(self.scoreboard, self.obstacles, self.player)
+            if profiler is not None:
+                profiler.mark("update_score")
+            self.obstacles = game.load_obstacles(self.obstacles, level.speed(self.scoreboard.getScore()))
+            if profiler is not None:
+                profiler.mark("load_obstacles")
+            if game.move(self.player, self.obstacles, self.scoreboard, self.floor, self.state, inputs):
+                self.events.append("jump")
+            if profiler is not None:
+                profiler.mark("move")
+            if self.scoreboard.getScore() != previous_score and self.scoreboard.getScore() % 10 == 0:
+                self.events.append("point")
+
+        elif previous_state == "game_over" and inputs & controls.START:
+            self.restart()
+            self.events.append("restart")
+
+        if self.state != "start":
+            self.player.update_sprite()
+        self.ticks += 1
+        return self.state
+
+    def restart(self):
+        """ Puts the player back at the start and begins a new run.
+        """
+        self.player.set_y_vel(0)
+        self.player.set_fall_count(0)
+        self.player.falling = True
+        self.obstacles = game.reset_game(self.player, self.scoreboard, self.rng, self.obstacles)
+        self.state = "playing"
+        self.scoreboard.updateText()
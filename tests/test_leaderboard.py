@@ -0,0 +1,168 @@
+""" Tests the leaderboard's ranking, wire protocol and client reconnects against a server on localhost.
+"""
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import leaderboard
+
+def wait_until(condition, timeout=5.0):
+    """ Polls a condition until it holds or the timeout passes.
+
+    Returns:
+        bool: the last value of the condition.
+    """
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.01)
+    return condition()
+
+def free_port():
+    """ Returns a port nothing is listening on.
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+class ServerThread:
+    def __init__(self, server, port):
+        """ Runs a Server on its own event loop thread, and can drop every connection it has.
+
+        Args:
+            server (leaderboard.Server): the server, kept across restarts.
+            port (int): the port to listen on.
+        """
+        self.server = server
+        self.port = port
+        self.writers = set()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.listener = None
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(5)
+
+    def start(self):
+        async def handle(reader, writer):
+            self.writers.add(writer)
+            await self.server.handle(reader, writer)
+
+        async def start():
+            self.listener = await asyncio.start_server(handle, "127.0.0.1", self.port)
+        self.call(start())
+
+    def stop(self):
+        """ Stops listening and drops the open connections.
+        """
+        async def stop():
+            if self.listener is not None:
+                self.listener.close()
+            for writer in self.writers:
+                writer.transport.abort()
+            self.writers.clear()
+            await asyncio.sleep(0.05)
+        self.call(stop())
+
+    def close(self):
+        self.stop()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+class LeaderboardTest(unittest.TestCase):
+    def test_rank_counts_higher_scores(self):
+        board = leaderboard.Leaderboard(top=2)
+        self.assertEqual(board.add(10, "a"), 1)
+        self.assertEqual(board.add(30, "b"), 1)
+        self.assertEqual(board.add(10, "c"), 2)
+        self.assertEqual(board.rank(20), 2)
+        self.assertEqual(board.rank(5), 4)
+        self.assertEqual(board.top(), [(30, "b"), (10, "a")])
+
+    def test_grows_past_the_initial_tree(self):
+        board = leaderboard.Leaderboard()
+        board.add(5)
+        board.add(5000)
+        self.assertEqual(board.rank(4999), 2)
+        self.assertEqual(board.rank(leaderboard.MAX_SCORE * 2), 1)
+
+class ClientTest(unittest.TestCase):
+    def setUp(self):
+        self.port = free_port()
+        self.server = ServerThread(leaderboard.Server(), self.port)
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close(0.5)
+        self.server.close()
+
+    def client(self, cabinet):
+        client = leaderboard.Client(("127.0.0.1", self.port), cabinet)
+        self.clients.append(client)
+        return client
+
+    def test_submissions_are_ranked(self):
+        self.server.start()
+        client = self.client("a")
+        low, high = client.submit(10), client.submit(20)
+        self.assertTrue(wait_until(lambda: client.rank(high) is not None))
+        self.assertEqual(client.rank(high), (1, 2))
+        #the first may have been ranked before the second arrived, and is moved down by the next push
+        self.assertTrue(wait_until(lambda: client.rank(low) == (2, 2)))
+
+    def test_ranks_moved_down_by_other_cabinets_are_pushed(self):
+        self.server.start()
+        first, second = self.client("a"), self.client("b")
+        submission = first.submit(10)
+        self.assertTrue(wait_until(lambda: first.rank(submission) == (1, 1)))
+        second.submit(50)
+        self.assertTrue(wait_until(lambda: first.rank(submission) == (2, 2)))
+
+    def test_reconnects_and_resends_without_counting_twice(self):
+        self.server.start()
+        client = self.client("a")
+        ranked = client.submit(10)
+        self.assertTrue(wait_until(lambda: client.rank(ranked) is not None))
+        self.server.stop()
+        self.assertTrue(wait_until(lambda: not client.connected))
+        waiting = client.submit(20)
+        self.server.start()
+        self.assertTrue(wait_until(lambda: client.rank(waiting) is not None, timeout=10))
+        self.assertEqual(client.rank(waiting), (1, 2))
+        self.assertEqual(self.server.server.leaderboard.total, 2)
+
+    def test_backoff_applies_after_a_submission(self):
+        attempts = []
+        connect = asyncio.open_connection
+
+        async def counted(*args, **kwargs):
+            attempts.append(time.monotonic())
+            return await connect(*args, **kwargs)
+
+        with mock.patch.object(leaderboard.asyncio, "open_connection", counted):
+            client = self.client("a")
+            client.submit(10)
+            time.sleep(2)
+            count = len(attempts)
+        #waits of 0.5, 1 and 2 seconds allow at most three attempts in two seconds
+        self.assertLessEqual(count, 3)
+        self.assertGreaterEqual(count, 2)
+
+    def test_close_cuts_the_backoff_short(self):
+        client = self.client("a")
+        client.submit(10)
+        time.sleep(0.1)
+        start = time.monotonic()
+        client.close(5)
+        self.assertLess(time.monotonic() - start, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+""" Tests that recordings replay to the same score, including sessions played with overridden constants.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import headless
+import controls
+import game
+import replay
+import simulation
+
+SCREEN_SIZE = (640, 360)
+SEED = 11
+TICKS = 3000
+OVERRIDES = {"RAND_DIST_BETWEEN_BLOCKS": [150, 200], "OBSTACLE_POOL_SIZE": 6, "PLAYER_START_Y": 150, "OBSTACLE_KINDS": game.OBSTACLE_KINDS[2:]}
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.defaults = {name: getattr(game, name) for name in game.SIMULATION_CONSTANTS}
+
+    def tearDown(self):
+        game.init(game.Config(SCREEN_SIZE, audio=False, **self.defaults))
+        shutil.rmtree(self.folder)
+
+    def record(self, name, **constants):
+        """ Plays a scripted session and records it.
+
+        Returns:
+            tuple: the recording's path and the session's final score.
+        """
+        path = os.path.join(self.folder, name)
+        game.init(game.Config(SCREEN_SIZE, audio=False, **constants))
+        sim = simulation.Simulation(SEED)
+        recorder = replay.Recorder(path, SEED, game.screen.get_size())
+        inputs = controls.START
+        for _ in range(TICKS):
+            sim.step(inputs)
+            recorder.record(inputs)
+            inputs = headless.simple_policy(sim) if sim.state == "playing" else controls.START
+        recorder.close(sim.scoreboard.getScore())
+        return path, sim.scoreboard.getScore()
+
+    def replay(self, path):
+        """ Verifies a recording in a fresh process, which starts from the default constants.
+        """
+        return subprocess.run([sys.executable, "replay.py", path], cwd=ROOT, capture_output=True, text=True)
+
+    def test_replays_to_the_recorded_score(self):
+        path, score = self.record("default.rec")
+        ok, replayed, recorded, ticks = replay.verify(path)
+        self.assertTrue(ok)
+        self.assertEqual((replayed, recorded, ticks), (score, score, TICKS))
+
+    def test_replays_with_the_recorded_constants(self):
+        path, score = self.record("overrides.rec", **OVERRIDES)
+        recording = replay.Recording(path)
+        for name, value in OVERRIDES.items():
+            self.assertEqual(recording.constants[name], value)
+        recording.close()
+        result = self.replay(path)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("recorded score {}".format(score), result.stdout)
+
+    def test_refuses_an_unclosed_recording(self):
+        path, _ = self.record("open.rec")
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - replay.TRAILER.size - replay.RUN.size)
+        with self.assertRaises(ValueError):
+            replay.Recording(path)
+
+if __name__ == "__main__":
+    unittest.main()
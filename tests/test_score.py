@@ -0,0 +1,110 @@
+""" Tests the score log's file format, its index and recovery from torn writes.
+"""
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import headless
+import score
+
+DAY = 86400
+
+def session(day, n, value):
+    """ Returns a session that finished n seconds after noon on day days after a fixed date.
+    """
+    noon = datetime.datetime(2024, 3, 1, 12).timestamp()
+    return score.Session(noon + day * DAY + n, value, value * 60, n)
+
+class ScoreLogTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "scores", "scores.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_reopens_with_the_same_sessions(self):
+        log = score.ScoreLog(self.path)
+        sessions = [session(0, 1, 5), session(0, 2, 9), session(1, 3, 7)]
+        log.append(sessions)
+        log.close()
+        log = score.ScoreLog(self.path)
+        self.assertEqual(len(log), 3)
+        self.assertEqual(log.best(), 9)
+        self.assertEqual(log.top(2), [sessions[1], sessions[2]])
+        self.assertEqual([count for _, count, _ in log.days()], [2, 1])
+        self.assertEqual(log.day(datetime.date(2024, 3, 2)), [sessions[2]])
+        log.close()
+
+    def test_rebuilds_a_missing_index(self):
+        log = score.ScoreLog(self.path)
+        log.append([session(0, 1, 5), session(0, 2, 9)])
+        log.close()
+        os.remove(self.path + ".idx")
+        log = score.ScoreLog(self.path)
+        self.assertEqual(log.best(), 9)
+        self.assertEqual(log.days()[0][1:], (2, 9))
+        log.close()
+
+    def test_reads_records_appended_after_the_index(self):
+        log = score.ScoreLog(self.path)
+        log.append([session(0, 1, 5)])
+        log.close()
+        with open(self.path, "ab") as f:
+            f.write(score.RECORD.pack(*session(0, 2, 12)))
+        log = score.ScoreLog(self.path)
+        self.assertEqual(len(log), 2)
+        self.assertEqual(log.best(), 12)
+        log.close()
+
+    def test_drops_a_torn_record(self):
+        log = score.ScoreLog(self.path)
+        log.append([session(0, 1, 5)])
+        log.close()
+        with open(self.path, "ab") as f:
+            f.write(score.RECORD.pack(*session(0, 2, 12))[:7])
+        log = score.ScoreLog(self.path)
+        self.assertEqual(len(log), 1)
+        log.append([session(0, 3, 8)])
+        self.assertEqual(os.path.getsize(self.path), score.HEADER.size + 2 * score.RECORD.size)
+        self.assertEqual(log.best(), 8)
+        log.close()
+
+    def test_starts_over_on_a_torn_header(self):
+        os.makedirs(os.path.dirname(self.path))
+        for data in (b"", score.MAGIC[:2]):
+            with open(self.path, "wb") as f:
+                f.write(data)
+            log = score.ScoreLog(self.path)
+            self.assertEqual(len(log), 0)
+            log.append([session(0, 1, 5)])
+            log.close()
+            log = score.ScoreLog(self.path)
+            self.assertEqual(len(log), 1)
+            log.close()
+
+    def test_refuses_other_files(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "wb") as f:
+            f.write(b"not a score log")
+        with self.assertRaises(ValueError):
+            score.ScoreLog(self.path)
+
+    def test_writer_appends_in_the_background(self):
+        log = score.ScoreLog(self.path)
+        writer = score.ScoreWriter(log, batch=2, interval=0.05)
+        for n in range(5):
+            writer.submit(session(0, n, n))
+        writer.close()
+        self.assertIsNone(writer.error)
+        self.assertEqual(len(log), 5)
+        self.assertEqual(log.best(), 4)
+        log.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import pygame
+import assets
+
+def font(name, size):
+    """ Returns a font from the fonts folder, loading each (file, size) only once.
+
+    Args:
+        name (String): the font file name.
+        size (int): the font size.
+
+    Returns:
+        pygame.font.Font: the font.
+    """
+    return assets.cache.get(("font", name, size), lambda: pygame.font.Font(assets.source("fonts/" + name), size))
+
+def render(name, size, string, color):
+    """ Returns a pre-rendered surface for a static string.
+
+    The returned surface is shared, so it must not be drawn on.
+
+    Args:
+        name (String): the font file name.
+        size (int): the font size.
+        string (String): the text to render.
+        color (tuple): the text color.
+
+    Returns:
+        pygame.Surface: the rendered text.
+    """
+    return assets.cache.get(("text", name, size, string, color), lambda: font(name, size).render(string, True, color))
+
+def number_label(name, size, prefix, color):
+    """ Returns a shared NumberLabel, e.g. for a screen that is drawn every frame.
+
+    Args:
+        name (String): the font file name.
+        size (int): the font size.
+        prefix (String): the static text drawn before the number.
+        color (tuple): the text color.
+
+    Returns:
+        NumberLabel: the label.
+    """
+    return assets.cache.get(("label", name, size, prefix, color), lambda: NumberLabel(name, size, prefix, color))
+
+class NumberLabel:
+    DIGITS = 6 # digits the surface has room for before it has to grow.
+
+    def __init__(self, name, size, prefix, color):
+        """ A static prefix followed by a number drawn from pre-rendered digit glyphs.
+
+        Changing the number only clears the digit area and blits one glyph per digit.
+
+        Args:
+            name (String): the font file name.
+            size (int): the font size.
+            prefix (String): the static text drawn before the number.
+            color (tuple): the text color.
+        """
+        self.prefix = render(name, size, prefix, color)
+        self.glyphs = [render(name, size, str(d), color) for d in range(10)]
+        self.value = None
+        self.size = self.prefix.get_size()
+        height = max([self.prefix.get_height()] + [g.get_height() for g in self.glyphs])
+        self.__glyph_width = max(g.get_width() for g in self.glyphs)
+        self.surface = pygame.Surface((self.prefix.get_width() + self.DIGITS * self.__glyph_width, height), pygame.SRCALPHA)
+        self.surface.blit(self.prefix, (0, 0))
+
+    def set(self, value):
+        """ Sets the number shown by the label.
+
+        Args:
+            value (int): the non-negative number to show.
+        """
+        if value == self.value:
+            return
+        self.value = value
+        digits = str(value)
+        x = self.prefix.get_width()
+        if x + len(digits) * self.__glyph_width > self.surface.get_width():
+            self.surface = pygame.Surface((x + len(digits) * self.__glyph_width, self.surface.get_height()), pygame.SRCALPHA)
+            self.surface.blit(self.prefix, (0, 0))
+
+        self.surface.fill((0, 0, 0, 0), (x, 0, self.surface.get_width() - x, self.surface.get_height()))
+        for d in digits:
+            glyph = self.glyphs[ord(d) - 48]
+            self.surface.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        self.size = (x, self.surface.get_height())
+
+    def get_rect(self, **position):
+        """ Returns the rect of the label's text, positioned like Surface.get_rect.
+
+        Args:
+            position: a rect attribute to set, e.g. center=(x, y).
+
+        Returns:
+            pygame.Rect: the rect of the label's text.
+        """
+        rect = pygame.Rect((0, 0), self.size)
+        for name, value in position.items():
+            setattr(rect, name, value)
+        return rect
+
+    def draw(self, surface, rect):
+        """ Draws the label's text.
+
+        Args:
+            surface (pygame.Surface): the surface to draw on.
+            rect (pygame.Rect): where to draw, see get_rect.
+
+        Returns:
+            pygame.Rect: the area of the surface that was drawn on.
+        """
+        return surface.blit(self.surface, rect, (0, 0) + self.size)